@@ -0,0 +1,101 @@
+"""
+Бенчмарки для консольного файлового менеджера
+
+Запуск:
+    python bench_filemanager.py sparse [размер_МБ]
+    python bench_filemanager.py memory [число_элементов]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import file_manager as fm
+
+
+def allocated_bytes(path):
+    """Сколько байт файл реально занимает на диске"""
+    return os.stat(path).st_blocks * 512
+
+
+def bench_sparse(size_mb=1024):
+    """Сравнение shutil.copy2 и копирования с сохранением дыр
+
+    Создается разреженный файл размером size_mb МБ, в котором записано
+    по 1 МБ данных в начале, середине и конце.
+    """
+    test_dir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(test_dir, "image.img")
+        size = size_mb * 1024 * 1024
+        with open(source, 'wb') as f:
+            f.truncate(size)
+            for offset in (0, size // 2, size - 1024 * 1024):
+                f.seek(offset)
+                f.write(os.urandom(1024 * 1024))
+
+        print(f"Исходный файл: {size_mb} МБ, на диске {allocated_bytes(source) // 1024} КБ")
+        for title, copier in (("shutil.copy2", shutil.copy2),
+                              ("copy_sparse_file", fm.copy_sparse_file)):
+            dest = os.path.join(test_dir, title)
+            start = time.perf_counter()
+            copier(source, dest)
+            elapsed = time.perf_counter() - start
+            print(f"{title:>20}: {elapsed:8.3f} с, на диске {allocated_bytes(dest) // 1024} КБ")
+            os.remove(dest)
+    finally:
+        shutil.rmtree(test_dir)
+
+
+def measure(func, *args):
+    """Результат func(*args) и пик памяти при вызове в байтах (по tracemalloc)"""
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def bench_memory(count=10_000_000):
+    """Память на элемент: список кортежей и EntryStore, построение и сортировка
+
+    Имена вида file_00000001.txt, как в большой папке с логами, идут
+    вперемешку, чтобы сортировке было что делать. Для сортировки
+    показывается пик памяти сверх уже построенного списка; время
+    сортировки завышено из-за трассировки tracemalloc.
+    """
+    def name(i):
+        return f"file_{i * 7919 % count:08d}.txt"
+
+    def build_tuples():
+        return [(name(i), False, True, i) for i in range(count)]
+
+    def build_store():
+        store = fm.EntryStore()
+        for i in range(count):
+            store.append(name(i), i, fm.stat.S_IFREG)
+        return store
+
+    print(f"Элементов: {count}")
+    for title, build, sort in (("список кортежей", build_tuples, sorted),
+                               ("EntryStore", build_store, fm.EntryStore.sorted_indices)):
+        entries, used = measure(build)
+        print(f"{title:>20}: {used / 1024 ** 2:10.1f} МБ, {used / count:6.1f} байт на элемент")
+        start = time.perf_counter()
+        _, peak = measure(sort, entries)
+        elapsed = time.perf_counter() - start
+        print(f"{'сортировка':>20}: {peak / 1024 ** 2:10.1f} МБ, {peak / count:6.1f} байт на элемент"
+              f" ({elapsed:.1f} с)")
+        del entries
+
+
+BENCHMARKS = {"sparse": bench_sparse, "memory": bench_memory}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(__doc__)
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*(int(arg) for arg in sys.argv[2:3]))
@@ -96,18 +96,56 @@
 
 
 
+import bisect
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import hashlib
+import itertools
+import mmap
 import os
 import shutil
+import stat
 import platform
+import posixpath
+import queue
+import re
+import select
+import struct
 import sys
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from array import array
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:
+    # Windows: ioctl недоступен, reflink не используется
+    fcntl = None
+
+try:
+    import readline
+except ImportError:
+    # Windows без pyreadline: ввод без автодополнения
+    readline = None
+
 # Глобальная переменная для рабочей директории
 working_directory = os.getcwd()
 
 # Константа для файла с данными банковского счета
 BANK_ACCOUNT_FILE = "bank_account.txt"
 
+# Сколько строк выводить поименно в отчетах и предпросмотрах
+REPORT_LIMIT = 20
+
 def clear_screen():
     """Очистка экрана консоли"""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -140,6 +178,17 @@ def show_menu():
     print("10. Мой банковский счет")
     print("11. Смена рабочей директории")
     print("12. Выход")
+    print("13. Настройки")
+    print("14. Переместить / переименовать")
+    print("15. Массовое переименование")
+    print("16. Права доступа и владелец")
+    print("17. Контрольные суммы (манифест)")
+    print("18. Сравнить папки")
+    print("19. Сравнить файлы")
+    print("20. Размер папки")
+    print("21. Поиск файлов")
+    print("22. Статистика по типам файлов")
+    print("23. Очистка старых файлов")
     print("=" * 60)
     return input("Выберите пункт меню: ")
 
@@ -149,6 +198,9 @@ def create_folder():
     """Создание папки в рабочей директории"""
     clear_screen()
     print_header("СОЗДАНИЕ ПАПКИ")
+    if archive_read_only():
+        return
+    print("Можно указать несколько папок через ';' и шаблоны: data/{2026..2027}/{01..12}")
     folder_name = input("Введите название папки: ").strip()
     
     if not folder_name:
@@ -156,6 +208,15 @@ def create_folder():
         wait_for_enter()
         return
     
+    if "{" in folder_name or ";" in folder_name:
+        specs = [path for part in folder_name.split(";") if part.strip()
+                 for path in expand_braces(part.strip())]
+        stats = create_folders_bulk(working_directory, specs)
+        print(f"Создано: {stats['created']}, уже существовало: {stats['existing']}, "
+              f"ошибок: {stats['failed']} ({stats['seconds']:.3f} с)")
+        wait_for_enter()
+        return
+    
     folder_path = os.path.join(working_directory, folder_name)
     
     try:
@@ -172,6 +233,8 @@ def delete_item():
     """Удаление файла или папки"""
     clear_screen()
     print_header("УДАЛЕНИЕ")
+    if archive_read_only():
+        return
     item_name = input("Введите название файла или папки для удаления: ").strip()
     
     if not item_name:
@@ -187,12 +250,16 @@ def delete_item():
         return
     
     try:
-        if os.path.isfile(item_path):
-            os.remove(item_path)
-            print(f"Файл '{item_name}' успешно удален!")
-        elif os.path.isdir(item_path):
-            shutil.rmtree(item_path)
+        is_dir = os.path.isdir(item_path) and not os.path.islink(item_path)
+        with low_io_priority():
+            count, kept = delete_path(item_path, exclude_rules())
+        if kept:
+            print(f"Папка '{item_name}' удалена частично: удалено файлов {count}, "
+                  f"оставлено исключенных элементов {kept}")
+        elif is_dir:
             print(f"Папка '{item_name}' успешно удалена!")
+        else:
+            print(f"Файл '{item_name}' успешно удален!")
     except Exception as e:
         print(f"Ошибка при удалении: {e}")
     
@@ -209,6 +276,12 @@ def copy_item():
         wait_for_enter()
         return
     
+    archive = split_archive_path(working_directory)
+    if archive:
+        copy_from_archive(archive, source_name)
+        wait_for_enter()
+        return
+    
     source_path = os.path.join(working_directory, source_name)
     
     if not os.path.exists(source_path):
@@ -231,12 +304,19 @@ def copy_item():
         return
     
     try:
-        if os.path.isfile(source_path):
-            shutil.copy2(source_path, dest_path)
-            print(f"Файл '{source_name}' скопирован в '{dest_name}'!")
-        elif os.path.isdir(source_path):
-            shutil.copytree(source_path, dest_path)
+        exclude = exclude_rules()
+        problem = preflight_copy(source_path, dest_path, exclude)
+        if problem:
+            print(f"❌ {problem}. Копирование отменено.")
+            wait_for_enter()
+            return
+        with low_io_priority():
+            report = copy_path(source_path, dest_path, exclude)
+        if os.path.isdir(source_path):
             print(f"Папка '{source_name}' скопирована в '{dest_name}'!")
+        else:
+            print(f"Файл '{source_name}' скопирован в '{dest_name}'!")
+        print_copy_report(report)
     except Exception as e:
         print(f"Ошибка при копировании: {e}")
     
@@ -248,14 +328,13 @@ def list_contents():
     print_header("СОДЕРЖИМОЕ ДИРЕКТОРИИ")
     
     try:
-        items = os.listdir(working_directory)
+        items = read_directory(working_directory)
         if not items:
             print("Директория пуста")
         else:
-            for i, item in enumerate(sorted(items), 1):
-                item_path = os.path.join(working_directory, item)
-                item_type = "📁" if os.path.isdir(item_path) else "📄"
-                print(f"{i:3}. {item_type} {item}")
+            for i, index in enumerate(items.sorted_indices(), 1):
+                item_type = "📁" if items.is_dir(index) else "📄"
+                print(f"{i:3}. {item_type} {items.name(index)}")
     except Exception as e:
         print(f"Ошибка при чтении директории: {e}")
     
@@ -267,14 +346,14 @@ def list_folders():
     print_header("ТОЛЬКО ПАПКИ")
     
     try:
-        items = os.listdir(working_directory)
-        folders = [item for item in items if os.path.isdir(os.path.join(working_directory, item))]
+        items = read_directory(working_directory)
+        folders = [index for index in items.sorted_indices() if items.is_dir(index)]
         
         if not folders:
             print("Папки не найдены")
         else:
-            for i, folder in enumerate(sorted(folders), 1):
-                print(f"{i:3}. 📁 {folder}")
+            for i, index in enumerate(folders, 1):
+                print(f"{i:3}. 📁 {items.name(index)}")
     except Exception as e:
         print(f"Ошибка при чтении директории: {e}")
     
@@ -285,36 +364,39 @@ def list_files():
     clear_screen()
     print_header("ТОЛЬКО ФАЙЛЫ")
     
+    files = []
     try:
-        items = os.listdir(working_directory)
-        files = [item for item in items if os.path.isfile(os.path.join(working_directory, item))]
+        items = read_directory(working_directory)
+        files = [index for index in items.sorted_indices() if items.is_file(index)]
         
         if not files:
             print("Файлы не найдены")
         else:
-            for i, file in enumerate(sorted(files), 1):
-                file_path = os.path.join(working_directory, file)
-                size = os.path.getsize(file_path)
-                print(f"{i:3}. 📄 {file} ({size} байт)")
+            for i, index in enumerate(files, 1):
+                print(f"{i:3}. 📄 {items.name(index)} ({items.sizes[index]} байт)")
     except Exception as e:
         print(f"Ошибка при чтении директории: {e}")
     
-    wait_for_enter()
+    if not files or split_archive_path(working_directory):
+        wait_for_enter()
+        return
+    
+    choice = input("\nНомер файла для просмотра (Enter - в главное меню): ").strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(files):
+        file_actions(os.path.join(working_directory, items.name(files[int(choice) - 1])))
 
 def system_info():
     """Информация об операционной системе"""
     clear_screen()
     print_header("ИНФОРМАЦИЯ О СИСТЕМЕ")
     
-    print(f"Операционная система: {platform.system()} {platform.release()}")
-    print(f"Версия: {platform.version()}")
-    print(f"Архитектура: {platform.machine()}")
-    print(f"Процессор: {platform.processor()}")
-    print(f"Имя компьютера: {platform.node()}")
-    print(f"Пользователь: {os.getenv('USERNAME') or os.getenv('USER') or 'Неизвестно'}")
+    for title, value in static_system_info():
+        print(f"{title}: {value}")
     print(f"Текущее время: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    wait_for_enter()
+    choice = input("\nM - монитор ресурсов, Enter - в главное меню: ").strip().lower()
+    if choice in ("m", "м"):
+        resource_monitor()
 
 def show_creator():
     """Информация о создателе программы"""
@@ -506,6 +588,7 @@ def change_directory():
     print("  • Абсолютный путь: C:/Users/User/Documents или /home/user/Documents")
     print("  • Относительный путь: user/my/ или .. (родительская папка)")
     print("  • '.' - текущая папка")
+    print("  • Часть имени из истории: 'proj src' - переход в самую частую подходящую папку")
     print("-" * 60)
     
     new_path = input("Введите новый путь: ").strip()
@@ -525,98 +608,3754 @@ def change_directory():
     # Нормализуем путь (убираем лишние разделители, обрабатываем ..)
     target_path = os.path.normpath(target_path)
     
+    # Путь может вести внутрь архива (.zip/.tar) - заходим в него как в папку
+    archive = split_archive_path(target_path)
+    in_archive = False
+    if archive:
+        try:
+            in_archive = get_archive_index(archive[0]).is_dir(archive[1])
+        except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+            print(f"❌ Не удалось прочитать архив: {e}")
+    
+    # Несуществующий путь ищем по ключевым словам в истории посещений
+    jump_path = None
+    if not in_archive and not os.path.isdir(target_path):
+        jump_path = find_directory(new_path, exclude=working_directory)
+    
     if os.path.exists(target_path) and os.path.isdir(target_path):
         working_directory = target_path
+        record_directory_visit(working_directory)
+        prefetch_listings(working_directory)
         print(f"✅ Рабочая директория изменена на:\n{working_directory}")
+    elif in_archive:
+        working_directory = target_path
+        print(f"✅ Открыт архив (только чтение):\n{working_directory}")
+    elif jump_path:
+        working_directory = jump_path
+        record_directory_visit(working_directory)
+        prefetch_listings(working_directory)
+        print(f"✅ Переход по истории:\n{working_directory}")
     else:
         print(f"❌ Путь не существует или не является папкой!")
     
     wait_for_enter()
 
-# ========== ГЛАВНАЯ ПРОГРАММА ==========
+# ========== ПРОСМОТР АРХИВОВ ==========
 
-def main():
-    """Главная функция программы"""
-    global working_directory
+# Расширения архивов, в которые можно "зайти" как в папку
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+# Размер блока при копировании члена архива
+ARCHIVE_COPY_CHUNK = 1024 * 1024
+
+# Кэш индексов архивов: путь к архиву -> ArchiveIndex
+_archive_index_cache = {}
+
+def is_archive_name(path):
+    """Проверка, является ли файл поддерживаемым архивом (по расширению)"""
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def split_archive_path(path):
+    """Разделение пути на (путь к архиву, путь внутри архива)
     
+    Возвращает None, если путь не ведет внутрь архива.
+    """
+    head = os.path.normpath(path)
+    inner = []
     while True:
-        choice = show_menu()
+        if os.path.isdir(head):
+            return None
+        if os.path.isfile(head):
+            if is_archive_name(head):
+                return head, "/".join(reversed(inner))
+            return None
+        parent, name = os.path.split(head)
+        if parent == head or not name:
+            return None
+        inner.append(name)
+        head = parent
+
+def archive_member_path(inner, name):
+    """Путь члена архива относительно корня архива"""
+    joined = posixpath.normpath(posixpath.join(inner, name.replace(os.sep, "/")))
+    return "" if joined == "." else joined.strip("/")
+
+def _copy_stream(src, dst, size, decompressor=None):
+    """Копирование size байт из src в dst блоками; возвращает CRC32 записанного"""
+    crc = 0
+    remaining = size
+    while remaining > 0:
+        chunk = src.read(min(ARCHIVE_COPY_CHUNK, remaining))
+        if not chunk:
+            raise EOFError("Архив поврежден: данные обрываются")
+        remaining -= len(chunk)
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        crc = zlib.crc32(chunk, crc)
+        dst.write(chunk)
+    if decompressor is not None:
+        tail = decompressor.flush()
+        crc = zlib.crc32(tail, crc)
+        dst.write(tail)
+    return crc
+
+class ArchiveIndex:
+    """Индекс таблицы членов архива
+    
+    Строится один раз по оглавлению архива и хранит для каждого члена
+    размер и смещение данных, чтобы достать один файл прямым seek
+    без распаковки всего архива.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        st = os.stat(path)
+        self.signature = (st.st_size, st.st_mtime_ns)
+        self.kind = "zip" if path.lower().endswith(".zip") else "tar"
+        self.compressed = self.kind == "tar" and not path.lower().endswith(".tar")
+        # Путь внутри архива -> (папка?, размер, запись оглавления)
+        self.members = {}
+        # Папка внутри архива -> {имя: папка?}
+        self.children = {"": {}}
+        if self.kind == "zip":
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    self._add(info.filename, info.is_dir(), info.file_size, info)
+        else:
+            with tarfile.open(path) as tf:
+                for info in tf:
+                    if info.isdir():
+                        self._add(info.name, True, 0, info)
+                    elif info.isreg():
+                        self._add(info.name, False, info.size, info)
+    
+    def _add(self, name, is_dir, size, info):
+        """Добавление члена архива вместе с неявными родительскими папками"""
+        parts = [part for part in name.split("/") if part not in ("", ".")]
+        if not parts or ".." in parts:
+            return
+        for i in range(1, len(parts)):
+            parent = "/".join(parts[:i])
+            if parent not in self.members:
+                self.members[parent] = (True, 0, None)
+                self.children.setdefault("/".join(parts[:i - 1]), {})[parts[i - 1]] = True
+                self.children.setdefault(parent, {})
+        key = "/".join(parts)
+        self.members[key] = (is_dir, size, info)
+        self.children.setdefault("/".join(parts[:-1]), {})[parts[-1]] = is_dir
+        if is_dir:
+            self.children.setdefault(key, {})
+    
+    def is_dir(self, inner):
+        """Проверка, является ли путь внутри архива папкой"""
+        return inner in self.children
+    
+    def listdir(self, inner):
+        """Содержимое папки внутри архива: список (имя, папка?, размер)"""
+        result = []
+        for name, is_dir in self.children[inner].items():
+            size = self.members[archive_member_path(inner, name)][1]
+            result.append((name, is_dir, size))
+        return result
+    
+    def extract(self, inner, dest_path):
+        """Копирование члена архива (файла или папки) в dest_path
         
-        if choice == "1":
-            create_folder()
-        elif choice == "2":
-            delete_item()
-        elif choice == "3":
-            copy_item()
-        elif choice == "4":
-            list_contents()
-        elif choice == "5":
-            list_folders()
-        elif choice == "6":
-            list_files()
-        elif choice == "7":
-            system_info()
-        elif choice == "8":
-            show_creator()
-        elif choice == "9":
-            play_quiz()
-        elif choice == "10":
-            bank_account()
-        elif choice == "11":
-            change_directory()
-        elif choice == "12":
-            clear_screen()
-            print("Спасибо за использование программы! До свидания!")
-            sys.exit(0)
+        Возвращает количество скопированных файлов.
+        """
+        if inner not in self.members and inner:
+            raise FileNotFoundError(inner)
+        if not self.is_dir(inner):
+            self._extract_file(self.members[inner][2], dest_path)
+            return 1
+        
+        os.makedirs(dest_path)
+        prefix = inner + "/" if inner else ""
+        files = []
+        for name, (is_dir, size, info) in self.members.items():
+            if not name.startswith(prefix):
+                continue
+            target = os.path.join(dest_path, *name[len(prefix):].split("/"))
+            if is_dir:
+                os.makedirs(target, exist_ok=True)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                files.append((info, target))
+        if self.compressed:
+            self._extract_stream(files)
+        else:
+            for info, target in files:
+                self._extract_file(info, target)
+        return len(files)
+    
+    def _extract_stream(self, files):
+        """Копирование файлов сжатого tar за один проход по архиву
+        
+        Сжатый поток нельзя читать с середины: отдельный extractfile для
+        каждого члена распаковывал бы архив с начала. Члены идут в порядке
+        архива и находятся по смещению заголовка.
+        """
+        targets = {info.offset: target for info, target in files}
+        if not targets:
+            return
+        with tarfile.open(self.path, "r|*") as tf:
+            for info in tf:
+                target = targets.pop(info.offset, None)
+                if target is None:
+                    continue
+                with open(target, 'wb') as dst:
+                    shutil.copyfileobj(tf.extractfile(info), dst, ARCHIVE_COPY_CHUNK)
+                if not targets:
+                    return
+        raise EOFError("Архив поврежден: данные обрываются")
+    
+    def _extract_file(self, info, dest_path):
+        """Копирование одного файла: прямой seek к данным, если возможно"""
+        with open(self.path, 'rb') as src, open(dest_path, 'wb') as dst:
+            if self.kind == "tar" and not self.compressed and not info.issparse():
+                src.seek(info.offset_data)
+                _copy_stream(src, dst, info.size)
+                return
+            
+            direct_zip = (self.kind == "zip"
+                          and info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+                          and not info.flag_bits & 0x1)
+            if direct_zip:
+                src.seek(info.header_offset)
+                header = src.read(30)
+                if header[:4] == b"PK\x03\x04":
+                    name_len, extra_len = struct.unpack("<HH", header[26:30])
+                    src.seek(name_len + extra_len, os.SEEK_CUR)
+                    decompressor = None
+                    if info.compress_type == zipfile.ZIP_DEFLATED:
+                        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                    crc = _copy_stream(src, dst, info.compress_size, decompressor)
+                    if crc != info.CRC:
+                        raise zipfile.BadZipFile(f"Неверная контрольная сумма: {info.filename}")
+                    return
+            
+            # Сжатый tar, шифрованный zip и прочее - через стандартные модули
+            if self.kind == "zip":
+                with zipfile.ZipFile(self.path) as zf, zf.open(info) as member:
+                    shutil.copyfileobj(member, dst, ARCHIVE_COPY_CHUNK)
+            else:
+                with tarfile.open(self.path) as tf:
+                    shutil.copyfileobj(tf.extractfile(info), dst, ARCHIVE_COPY_CHUNK)
+
+def get_archive_index(archive_path):
+    """Индекс архива из кэша; перестраивается, только если архив изменился"""
+    st = os.stat(archive_path)
+    index = _archive_index_cache.get(archive_path)
+    if index is None or index.signature != (st.st_size, st.st_mtime_ns):
+        index = ArchiveIndex(archive_path)
+        _archive_index_cache[archive_path] = index
+    return index
+
+def read_directory(path):
+    """Содержимое папки (обычной или внутри архива)
+    
+    Возвращает EntryStore; итерация по нему дает кортежи
+    (имя, папка?, файл?, размер).
+    """
+    archive = split_archive_path(path)
+    if archive:
+        archive_path, inner = archive
+        index = get_archive_index(archive_path)
+        if not index.is_dir(inner):
+            raise NotADirectoryError(path)
+        store = EntryStore()
+        for name, is_dir, size in index.listdir(inner):
+            store.append(name, size, entry_mode(is_dir, not is_dir))
+        return store
+    
+    return cached_listing(path)
+
+def archive_read_only():
+    """Проверка, что рабочая директория внутри архива (только чтение)"""
+    if split_archive_path(working_directory):
+        print("❌ Содержимое архива доступно только для чтения!")
+        wait_for_enter()
+        return True
+    return False
+
+def copy_from_archive(archive, source_name):
+    """Копирование файла/папки из архива в папку, где лежит архив"""
+    archive_path, inner = archive
+    try:
+        index = get_archive_index(archive_path)
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+        print(f"Ошибка при копировании: не удалось прочитать архив: {e}")
+        return
+    member = archive_member_path(inner, source_name)
+    if member not in index.members and not index.is_dir(member):
+        print(f"Ошибка: '{source_name}' не найден!")
+        return
+    
+    dest_name = input("Введите имя копии (рядом с архивом): ").strip()
+    if not dest_name:
+        print("Ошибка: Новое имя не может быть пустым!")
+        return
+    
+    dest_path = os.path.join(os.path.dirname(archive_path), dest_name)
+    if os.path.exists(dest_path):
+        print(f"Ошибка: '{dest_name}' уже существует!")
+        return
+    
+    try:
+        count = index.extract(member, dest_path)
+        print(f"Из архива скопировано файлов: {count} -> '{dest_path}'")
+    except Exception as e:
+        print(f"Ошибка при копировании: {e}")
+
+# ========== РЕЖИМЫ КОПИРОВАНИЯ ==========
+
+# Код ioctl FICLONE (Linux): клон файла без копирования данных (btrfs, XFS)
+FICLONE = 0x40049409
+
+# Размер блока при копировании диапазонов файла
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Границы размера буфера копирования
+MIN_COPY_BUFFER = 64 * 1024
+MAX_COPY_BUFFER = 16 * 1024 * 1024
+
+# Файлы больше этого размера копируются без засорения кэша страниц
+CACHE_FRIENDLY_THRESHOLD = 64 * 1024 * 1024
+
+# Через сколько записанных байт сбрасывать данные на диск и вытеснять из кэша
+CACHE_DROP_INTERVAL = 64 * 1024 * 1024
+
+# Файлы больше этого размера копируются с O_DIRECT (если включено в настройках)
+DIRECT_IO_THRESHOLD = 1024 * 1024 * 1024
+
+# Выравнивание буфера и длины записи для O_DIRECT
+DIRECT_IO_ALIGNMENT = 4096
+
+# Настройки операций с файлами (меняются в пункте меню "Настройки")
+operation_settings = {
+    "copy_mode": "auto",
+    "allow_hardlinks": False,
+    "sparse_copy": True,
+    "direct_io": False,
+    "bytes_per_sec": 0,
+    "files_per_sec": 0,
+    "low_io_priority": False,
+    "verify_copy": "off",
+    "prefetch_listings": True,
+    "monitor_interval": 1,
+    "exclude_patterns": "",
+}
+
+# Описание настроек для меню: ключ -> (название, допустимые значения или тип)
+SETTINGS_INFO = {
+    "copy_mode": ("Режим копирования (auto - reflink, если возможно)", ("auto", "copy")),
+    "allow_hardlinks": ("Жесткие ссылки вместо копий на той же ФС", bool),
+    "sparse_copy": ("Сохранять дыры в разреженных файлах", bool),
+    "direct_io": ("O_DIRECT для файлов больше 1 ГБ", bool),
+    "bytes_per_sec": ("Лимит скорости, байт/с (0 - без лимита)", int),
+    "files_per_sec": ("Лимит файлов в секунду (0 - без лимита)", int),
+    "low_io_priority": ("Низкий приоритет ввода-вывода", bool),
+    "verify_copy": ("Проверка копий (direct - чтение в обход кэша)", ("off", "on", "direct")),
+    "prefetch_listings": ("Фоновая предзагрузка соседних папок", bool),
+    "monitor_interval": ("Интервал монитора ресурсов, с", int),
+    "exclude_patterns": ("Исключения в синтаксисе .gitignore, через ';'", str),
+}
+
+def same_device(source_path, dest_path, follow_symlinks=True):
+    """Проверка, что источник и папка назначения на одном устройстве
+    
+    С follow_symlinks=False для ссылки берется устройство самой ссылки,
+    а не цели: так проверяют перемещение, где переносится ссылка.
+    """
+    dest_dir = os.path.dirname(os.path.abspath(dest_path))
+    source_dev = os.stat(source_path, follow_symlinks=follow_symlinks).st_dev
+    return source_dev == os.stat(dest_dir).st_dev
+
+def try_reflink(source_path, dest_path):
+    """Попытка клонировать файл ioctl FICLONE; True при успехе"""
+    if fcntl is None:
+        return False
+    try:
+        with open(source_path, 'rb') as src, open(dest_path, 'xb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError:
+                dst.close()
+                os.remove(dest_path)
+                return False
+    except OSError:
+        return False
+    shutil.copystat(source_path, dest_path)
+    return True
+
+def allocated_size(st):
+    """Сколько байт файл занимает на диске по stat (не больше его размера)"""
+    blocks = getattr(st, "st_blocks", None)
+    return st.st_size if blocks is None else min(blocks * 512, st.st_size)
+
+def sparse_copy_enabled():
+    """Сохраняет ли копирование дыры разреженных файлов"""
+    return operation_settings["sparse_copy"] and hasattr(os, "SEEK_DATA")
+
+def is_sparse_file(path):
+    """Проверка, занимает ли файл на диске меньше своего размера"""
+    st = os.stat(path)
+    return getattr(st, "st_blocks", None) is not None and st.st_blocks * 512 < st.st_size
+
+def _copy_fd_range(fd_in, fd_out, offset, length, out_offset=None, digest=None):
+    """Копирование диапазона [offset, offset + length) между дескрипторами
+    
+    Данные пишутся с out_offset (по умолчанию - с того же смещения).
+    Если передан digest, скопированные данные добавляются в сумму.
+    """
+    end = offset + length
+    shift = 0 if out_offset is None else out_offset - offset
+    while offset < end:
+        chunk = os.pread(fd_in, min(COPY_CHUNK_SIZE, end - offset), offset)
+        if not chunk:
+            break
+        rate_limiter("bytes_per_sec").consume(len(chunk))
+        if digest is not None:
+            digest.update(chunk)
+        view = memoryview(chunk)
+        written = 0
+        while written < len(chunk):
+            written += os.pwrite(fd_out, view[written:], offset + shift + written)
+        offset += len(chunk)
+
+def _hash_zeros(digest, length):
+    """Добавление в сумму length нулевых байт (дыра разреженного файла)"""
+    zeros = memoryview(bytes(min(length, COPY_CHUNK_SIZE)))
+    while length > 0:
+        digest.update(zeros[:min(length, len(zeros))])
+        length -= len(zeros)
+
+def copy_sparse_file(source_path, dest_path, compute_hash=False):
+    """Копирование только занятых экстентов файла (SEEK_DATA/SEEK_HOLE)
+    
+    Дыры не записываются, поэтому в копии они сохраняются. При
+    compute_hash сумма источника считается в том же проходе (дыры
+    учитываются как нули, не читаясь с диска). Возвращает сумму или None.
+    """
+    digest = hashlib.new(HASH_ALGORITHM) if compute_hash else None
+    with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        fd_in, fd_out = src.fileno(), dst.fileno()
+        size = os.fstat(fd_in).st_size
+        offset = 0
+        while offset < size:
+            try:
+                data_start = os.lseek(fd_in, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:
+                    # После offset данных нет - только дыра до конца файла
+                    break
+                raise
+            data_end = os.lseek(fd_in, data_start, os.SEEK_HOLE)
+            if digest is not None:
+                _hash_zeros(digest, data_start - offset)
+            _copy_fd_range(fd_in, fd_out, data_start, data_end - data_start, digest=digest)
+            offset = data_end
+        if digest is not None:
+            _hash_zeros(digest, size - offset)
+        os.ftruncate(fd_out, size)
+    shutil.copystat(source_path, dest_path)
+    return digest.hexdigest() if compute_hash else None
+
+def choose_buffer_size(file_size, block_size):
+    """Размер буфера: около 1/64 файла, кратный блоку ФС, от 64 КБ до 16 МБ"""
+    block_size = max(block_size, DIRECT_IO_ALIGNMENT)
+    size = min(max(file_size // 64, MIN_COPY_BUFFER), MAX_COPY_BUFFER)
+    return max(block_size, size - size % block_size)
+
+def _fadvise(fd, offset, length, advice):
+    """posix_fadvise, если он доступен на этой платформе"""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, offset, length, advice)
+        except OSError:
+            pass
+
+def _drop_written(fd, offset, length):
+    """Сброс записанного диапазона на диск и вытеснение его из кэша страниц"""
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+    _fadvise(fd, offset, length, getattr(os, "POSIX_FADV_DONTNEED", 0))
+
+def _open_direct(path, flags):
+    """Открытие файла с O_DIRECT; None, если ФС его не поддерживает"""
+    try:
+        return os.open(path, flags | os.O_DIRECT, 0o666)
+    except OSError as e:
+        if e.errno != errno.EINVAL:
+            raise
+        return None
+
+def copy_file_buffered(source_path, dest_path, compute_hash=False):
+    """Копирование файла буфером, подобранным под размер файла и ФС
+    
+    Большие файлы не вытесняют из кэша страниц чужие данные: источник
+    читается с POSIX_FADV_SEQUENTIAL, записанное периодически сбрасывается
+    на диск и вытесняется POSIX_FADV_DONTNEED. Очень большие файлы можно
+    копировать с O_DIRECT в обход кэша.
+    
+    При compute_hash сумма источника считается в том же проходе: пока
+    фоновый поток хэширует один буфер, в другой читается следующий блок.
+    Возвращает сумму источника или None.
+    """
+    st = os.stat(source_path)
+    block_size = getattr(st, "st_blksize", 0)
+    if hasattr(os, "statvfs"):
+        block_size = max(block_size, os.statvfs(os.path.dirname(os.path.abspath(dest_path))).f_bsize)
+    buffer_size = choose_buffer_size(st.st_size, block_size)
+    cache_friendly = st.st_size >= CACHE_FRIENDLY_THRESHOLD
+    try_direct = (operation_settings["direct_io"] and hasattr(os, "O_DIRECT")
+                  and st.st_size >= DIRECT_IO_THRESHOLD)
+    digest = hashlib.new(HASH_ALGORITHM) if compute_hash else None
+    
+    # Каждый ресурс закрывается, даже если следующий не удалось получить
+    with ExitStack() as stack:
+        direct = False
+        if try_direct:
+            # Пара O_DIRECT открывается целиком или не открывается совсем
+            with ExitStack() as direct_stack:
+                fd_in = _open_direct(source_path, os.O_RDONLY)
+                if fd_in is not None:
+                    direct_stack.callback(os.close, fd_in)
+                    fd_out = _open_direct(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+                    if fd_out is not None:
+                        direct_stack.callback(os.close, fd_out)
+                        stack.enter_context(direct_stack.pop_all())
+                        direct = True
+        if not direct:
+            fd_in = os.open(source_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            stack.callback(os.close, fd_in)
+            fd_out = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+            stack.callback(os.close, fd_out)
+        
+        # mmap дает буфер, выровненный по странице, что требуется для O_DIRECT
+        views = []
+        for _ in range(2 if compute_hash else 1):
+            buffer = stack.enter_context(mmap.mmap(-1, buffer_size))
+            views.append(stack.enter_context(memoryview(buffer)))
+        # Хэширование по порядку в одном фоновом потоке; по задаче на буфер.
+        # Пул закрывается раньше буферов: все задачи успевают завершиться
+        hasher = stack.enter_context(ThreadPoolExecutor(1)) if compute_hash else None
+        hashing = [None] * len(views)
+        src = stack.enter_context(open(fd_in, 'rb', buffering=0, closefd=False))
+        dst = stack.enter_context(open(fd_out, 'wb', buffering=0, closefd=False))
+        if cache_friendly:
+            _fadvise(fd_in, 0, 0, getattr(os, "POSIX_FADV_SEQUENTIAL", 0))
+        copied = dropped = 0
+        index = 0
+        while True:
+            view = views[index]
+            if hashing[index] is not None:
+                hashing[index].result()
+            n = src.readinto(view)
+            if not n:
+                break
+            rate_limiter("bytes_per_sec").consume(n)
+            # При O_DIRECT длина записи должна быть кратна выравниванию
+            length = -(-n // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT if direct else n
+            written = 0
+            while written < length:
+                written += dst.write(view[written:length])
+            if compute_hash:
+                hashing[index] = hasher.submit(digest.update, view[:n])
+                index = (index + 1) % len(views)
+            copied += n
+            if cache_friendly and not direct and copied - dropped >= CACHE_DROP_INTERVAL:
+                _drop_written(fd_out, dropped, copied - dropped)
+                dropped = copied
+        if direct:
+            os.ftruncate(fd_out, copied)
+        elif cache_friendly and copied > dropped:
+            _drop_written(fd_out, dropped, copied - dropped)
+    shutil.copystat(source_path, dest_path)
+    return digest.hexdigest() if compute_hash else None
+
+def verify_copy(source_path, dest_path, source_digest=None, direct=False):
+    """Проверка копии: сумма копии, прочитанной заново с диска
+    
+    Перед чтением копия сбрасывается на диск и вытесняется из кэша
+    страниц (или читается с O_DIRECT), чтобы сравнивались данные
+    на носителе, а не в памяти. Возвращает "ok" или "mismatch".
+    """
+    if source_digest is None:
+        source_digest = hash_file(source_path)
+    if not direct:
+        with open(dest_path, 'rb') as f:
+            _drop_written(f.fileno(), 0, 0)
+    dest_digest = hash_file(dest_path, direct=direct)
+    return "ok" if dest_digest == source_digest else "mismatch"
+
+def copy_file(source_path, dest_path, same_dev):
+    """Копирование одного файла самым быстрым доступным способом
+    
+    Возвращает (способ, проверка). Способ: "reflink", "hardlink", "sparse"
+    или "copy". Проверка: "ok", "mismatch", "shared" (данные общие с
+    оригиналом) или None, если проверка копий выключена.
+    """
+    verify = operation_settings["verify_copy"]
+    shared = None if verify == "off" else "shared"
+    rate_limiter("files_per_sec").consume(1)
+    if same_dev and operation_settings["copy_mode"] == "auto":
+        if try_reflink(source_path, dest_path):
+            return "reflink", shared
+    if same_dev and operation_settings["allow_hardlinks"]:
+        try:
+            os.link(source_path, dest_path)
+            return "hardlink", shared
+        except OSError:
+            pass
+    if sparse_copy_enabled() and is_sparse_file(source_path):
+        try:
+            digest = copy_sparse_file(source_path, dest_path, compute_hash=verify != "off")
+            if verify == "off":
+                return "sparse", None
+            return "sparse", verify_copy(source_path, dest_path, digest, direct=verify == "direct")
+        except OSError as e:
+            # ФС не поддерживает SEEK_DATA - копируем обычным способом
+            if e.errno not in (errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+    digest = copy_file_buffered(source_path, dest_path, compute_hash=verify != "off")
+    if verify == "off":
+        return "copy", None
+    return "copy", verify_copy(source_path, dest_path, digest, direct=verify == "direct")
+
+def _copy_tree(source_path, dest_path, relative, same_dev, report, exclude=None):
+    """Рекурсивное копирование папки с записью способа для каждого файла"""
+    os.makedirs(dest_path)
+    with os.scandir(source_path) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    for entry in entries:
+        target = os.path.join(dest_path, entry.name)
+        rel = os.path.join(relative, entry.name)
+        is_dir = entry.is_dir()
+        if exclude is not None and exclude.excluded(rel, is_dir):
+            continue
+        if is_dir:
+            _copy_tree(entry.path, target, rel, same_dev, report, exclude)
+        else:
+            report.append((rel, *copy_file(entry.path, target, same_dev)))
+    shutil.copystat(source_path, dest_path)
+
+def copy_path(source_path, dest_path, exclude=None):
+    """Копирование файла или папки
+    
+    Возвращает отчет: список (относительный путь, способ, результат проверки).
+    Содержимое папки, исключенное правилами exclude, не копируется.
+    """
+    same_dev = same_device(source_path, dest_path)
+    report = []
+    if os.path.isdir(source_path):
+        _copy_tree(source_path, dest_path, "", same_dev, report, exclude)
+    else:
+        report.append((os.path.basename(source_path), *copy_file(source_path, dest_path, same_dev)))
+    return report
+
+def print_copy_report(report):
+    """Вывод способа копирования и результата проверки для каждого файла"""
+    # Несовпавшие копии показываем первыми, чтобы они не потерялись
+    shown = sorted(report, key=lambda item: item[2] != "mismatch")[:REPORT_LIMIT]
+    for rel, method, status in shown:
+        check = f" - проверка: {status}" if status else ""
+        print(f"  [{method}] {rel}{check}")
+    if len(report) > REPORT_LIMIT:
+        print(f"  ... и еще {len(report) - REPORT_LIMIT} файлов")
+    totals = {}
+    checks = {}
+    for rel, method, status in report:
+        totals[method] = totals.get(method, 0) + 1
+        if status:
+            checks[status] = checks.get(status, 0) + 1
+    summary = ", ".join(f"{method}: {count}" for method, count in sorted(totals.items()))
+    print(f"Итого файлов: {len(report)} ({summary or 'нет'})")
+    if checks:
+        print("Проверка: " + ", ".join(f"{status}: {count}" for status, count in sorted(checks.items())))
+        if checks.get("mismatch"):
+            print("❌ Есть копии, не совпадающие с оригиналом!")
+
+# ========== ОГРАНИЧЕНИЕ НАГРУЗКИ НА ДИСК ==========
+
+# Номера системных вызовов ioprio_set/ioprio_get для архитектур Linux
+IOPRIO_SYSCALLS = {
+    "x86_64": (251, 252),
+    "i386": (289, 290),
+    "i686": (289, 290),
+    "aarch64": (30, 31),
+}
+
+# Параметры ioprio: класс idle - диск получаем, только когда он простаивает
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+
+# Прибавка к nice, если ioprio недоступен
+LOW_PRIORITY_NICE = 10
+
+# Ограничители скорости: имя настройки -> TokenBucket
+_rate_limiters = {}
+
+# Процесс уже понижен через os.nice (вернуть приоритет нельзя)
+_process_niced = False
+
+class TokenBucket:
+    """Ограничитель скорости по алгоритму "ведро с токенами"
+    
+    Токены пополняются со скоростью rate в секунду, ведро вмещает
+    запас на одну секунду. rate = 0 означает отсутствие ограничения.
+    """
+    
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def consume(self, amount):
+        """Забрать amount токенов, при нехватке - подождать"""
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            # Долг погашается ожиданием; запрос больше ведра тоже проходит
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+def rate_limiter(setting):
+    """Ограничитель для настройки "bytes_per_sec" или "files_per_sec" """
+    rate = operation_settings[setting]
+    limiter = _rate_limiters.get(setting)
+    if limiter is None or limiter.rate != rate:
+        limiter = TokenBucket(rate)
+        _rate_limiters[setting] = limiter
+    return limiter
+
+def _ioprio_syscall():
+    """Функция syscall из libc и номера ioprio_set/ioprio_get или None"""
+    numbers = IOPRIO_SYSCALLS.get(platform.machine())
+    if not sys.platform.startswith("linux") or numbers is None:
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        return None
+    return libc.syscall, numbers
+
+@contextmanager
+def low_io_priority():
+    """Выполнение блока с низким приоритетом ввода-вывода (если включено)
+    
+    На Linux текущему потоку ставится класс ioprio idle, после блока
+    приоритет восстанавливается. Иначе процесс понижается через os.nice
+    один раз за сессию.
+    """
+    global _process_niced
+    
+    if not operation_settings["low_io_priority"]:
+        yield
+        return
+    
+    ioprio = _ioprio_syscall()
+    previous = -1
+    if ioprio is not None:
+        syscall, (set_number, get_number) = ioprio
+        previous = syscall(get_number, IOPRIO_WHO_PROCESS, 0)
+        if previous >= 0:
+            idle = IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT
+            if syscall(set_number, IOPRIO_WHO_PROCESS, 0, idle) != 0:
+                previous = -1
+    if previous < 0 and not _process_niced and hasattr(os, "nice"):
+        os.nice(LOW_PRIORITY_NICE)
+        _process_niced = True
+    try:
+        yield
+    finally:
+        if previous >= 0:
+            syscall(set_number, IOPRIO_WHO_PROCESS, 0, previous)
+
+def _delete_tree(path, relative, exclude, limiter):
+    """Удаление содержимого папки кроме исключенного: (удалено файлов, оставлено исключенных)"""
+    count = 0
+    kept = 0
+    with os.scandir(path) as entries:
+        entries = list(entries)
+    for entry in entries:
+        rel = os.path.join(relative, entry.name) if relative else entry.name
+        is_dir = entry.is_dir(follow_symlinks=False)
+        if exclude.excluded(rel, is_dir):
+            kept += 1
+            continue
+        if is_dir:
+            removed, child_kept = _delete_tree(entry.path, rel, exclude, limiter)
+            count += removed
+            kept += child_kept
+            if not child_kept:
+                os.rmdir(entry.path)
         else:
-            print("❌ Неверный пункт меню! Пожалуйста, выберите 1-12.")
+            limiter.consume(1)
+            os.remove(entry.path)
+            count += 1
+    return count, kept
+
+def delete_path(path, exclude=None):
+    """Удаление файла или папки с учетом лимита файлов в секунду
+    
+    Возвращает (удалено файлов, оставлено исключенных элементов).
+    Исключенное правилами exclude содержимое папки остается на месте
+    вместе с папками, в которых оно лежит; сама папка тогда тоже
+    остается.
+    """
+    limiter = rate_limiter("files_per_sec")
+    if not os.path.isdir(path) or os.path.islink(path):
+        limiter.consume(1)
+        os.remove(path)
+        return 1, 0
+    
+    if exclude is not None:
+        count, kept = _delete_tree(path, "", exclude, limiter)
+        if not kept:
+            os.rmdir(path)
+        return count, kept
+    
+    count = 0
+    for root, dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            limiter.consume(1)
+            os.remove(os.path.join(root, name))
+            count += 1
+        for name in dirs:
+            dir_path = os.path.join(root, name)
+            # Ссылки на папки os.walk не обходит - удаляем саму ссылку
+            if os.path.islink(dir_path):
+                os.remove(dir_path)
+            else:
+                os.rmdir(dir_path)
+    os.rmdir(path)
+    return count, 0
+
+# ========== НАСТРОЙКИ ==========
+
+def settings_menu():
+    """Просмотр и изменение настроек операций с файлами"""
+    while True:
+        clear_screen()
+        print_header("НАСТРОЙКИ")
+        keys = list(SETTINGS_INFO)
+        for i, key in enumerate(keys, 1):
+            title = SETTINGS_INFO[key][0]
+            print(f"{i}. {title}: {operation_settings[key]}")
+        print("0. Выход в главное меню")
+        print("-" * 60)
+        
+        choice = input("Выберите настройку для изменения: ").strip()
+        if choice == "0":
+            break
+        if not choice.isdigit() or not 1 <= int(choice) <= len(keys):
+            print("❌ Неверный пункт меню!")
             wait_for_enter()
+            continue
+        
+        key = keys[int(choice) - 1]
+        kind = SETTINGS_INFO[key][1]
+        if kind is bool:
+            operation_settings[key] = not operation_settings[key]
+        elif isinstance(kind, tuple):
+            # Переключаем на следующее допустимое значение по кругу
+            position = kind.index(operation_settings[key])
+            operation_settings[key] = kind[(position + 1) % len(kind)]
+        else:
+            try:
+                operation_settings[key] = kind(input("Введите новое значение: ").strip())
+            except ValueError:
+                print("❌ Некорректное значение!")
+                wait_for_enter()
 
-if __name__ == "__main__":
-    main()
+# ========== ПЕРЕМЕЩЕНИЕ ==========
 
+def _move_file_across(source_path, dest_path):
+    """Перемещение файла на другое устройство: копия, проверка, удаление источника"""
+    method, status = copy_file(source_path, dest_path, False)
+    if status == "mismatch":
+        raise OSError(f"Копия не совпадает с оригиналом: {dest_path}")
+    with open(dest_path, 'rb') as f:
+        # Источник удаляем только после того, как копия надежно на диске
+        os.fsync(f.fileno())
+        copied_size = os.fstat(f.fileno()).st_size
+    if copied_size != os.path.getsize(source_path):
+        raise OSError(f"Размер копии не совпадает с оригиналом: {dest_path}")
+    os.remove(source_path)
 
-# Описание функционала:
-# Основные возможности:
-#
-#     Создание папки - создает новую папку в текущей директории
-#
-#     Удаление - удаляет файл или папку с подтверждением
-#
-#     Копирование - копирует файлы и папки с новым именем
-#
-#     Просмотр содержимого - показывает все файлы и папки с иконками
-#
-#     Только папки - фильтрует и показывает только папки
-#
-#     Только файлы - показывает только файлы с размерами
-#
-#     Информация о системе - выводит детальную информацию об ОС
-#
-#     Создатель программы - информация об авторе
-#
-#     Викторина - игра с 5 вопросами и подсчетом очков
-#
-#     Банковский счет - управление счетом с сохранением в файл
-#
-#     Смена директории - поддержка абсолютных и относительных путей
-#
-#     Выход - корректное завершение программы
-#
-# Дополнительные улучшения:
-#
-#     ✅ Сохранение данных банковского счета в файл
-#
-#     ✅ Эмодзи для наглядного отображения 📁 📄
-#
-#     ✅ Информация о размере файлов
-#
-#     ✅ Обработка ошибок и исключений
-#
-#     ✅ Красивое форматирование вывода
-#
-#     ✅ Поддержка кириллицы
-#
-#     ✅ Работает на Windows и Linux/Mac
+def _move_link_across(source_path, dest_path):
+    """Перемещение символической ссылки: ссылка создается заново, а не копируется по содержимому"""
+    target = os.readlink(source_path)
+    os.symlink(target, dest_path, target_is_directory=os.path.isdir(source_path))
+    os.unlink(source_path)
 
+def move_path(source_path, dest_path):
+    """Перемещение файла или папки
+    
+    На одном устройстве - атомарный os.rename. Между устройствами файлы
+    копируются по одному, и каждый исходный файл удаляется сразу после
+    проверки копии, поэтому лишнее место на диске занимает не больше
+    одного файла. Символические ссылки (на файлы и на папки) переносятся
+    как ссылки. Возвращает способ: "rename" или "stream".
+    """
+    if same_device(source_path, dest_path, follow_symlinks=False):
+        os.rename(source_path, dest_path)
+        return "rename"
+    
+    if os.path.islink(source_path):
+        _move_link_across(source_path, dest_path)
+        return "stream"
+    if not os.path.isdir(source_path):
+        _move_file_across(source_path, dest_path)
+        return "stream"
+    
+    for root, dirs, files in os.walk(source_path):
+        target_root = os.path.join(dest_path, os.path.relpath(root, source_path))
+        os.makedirs(target_root, exist_ok=True)
+        # os.walk не заходит в ссылки на папки, но перечисляет их в dirs
+        for name in [name for name in dirs if os.path.islink(os.path.join(root, name))]:
+            _move_link_across(os.path.join(root, name), os.path.join(target_root, name))
+            dirs.remove(name)
+        for name in files:
+            source = os.path.join(root, name)
+            if os.path.islink(source):
+                _move_link_across(source, os.path.join(target_root, name))
+            else:
+                _move_file_across(source, os.path.join(target_root, name))
+    
+    # Переносим атрибуты папок и удаляем опустевшие папки источника
+    for root, dirs, files in os.walk(source_path, topdown=False):
+        target_root = os.path.join(dest_path, os.path.relpath(root, source_path))
+        shutil.copystat(root, target_root)
+        os.rmdir(root)
+    return "stream"
 
+def move_item():
+    """Перемещение или переименование файла/папки"""
+    clear_screen()
+    print_header("ПЕРЕМЕЩЕНИЕ / ПЕРЕИМЕНОВАНИЕ")
+    if archive_read_only():
+        return
+    source_name = input("Введите название файла/папки: ").strip()
+    
+    if not source_name:
+        print("Ошибка: Имя не может быть пустым!")
+        wait_for_enter()
+        return
+    
+    source_path = os.path.join(working_directory, source_name)
+    
+    if not os.path.lexists(source_path):
+        print(f"Ошибка: '{source_name}' не найден!")
+        wait_for_enter()
+        return
+    
+    dest_name = input("Введите новое имя или путь: ").strip()
+    
+    if not dest_name:
+        print("Ошибка: Новое имя не может быть пустым!")
+        wait_for_enter()
+        return
+    
+    dest_path = os.path.join(working_directory, dest_name)
+    
+    if os.path.lexists(dest_path):
+        print(f"Ошибка: '{dest_name}' уже существует!")
+        wait_for_enter()
+        return
+    
+    try:
+        with low_io_priority():
+            method = move_path(source_path, dest_path)
+        if method == "rename":
+            print(f"'{source_name}' перемещен в '{dest_name}' (переименование)")
+        else:
+            print(f"'{source_name}' перемещен в '{dest_name}' (копирование на другое устройство)")
+    except Exception as e:
+        print(f"Ошибка при перемещении: {e}")
+    
+    wait_for_enter()
+
+# ========== МАССОВОЕ ПЕРЕИМЕНОВАНИЕ ==========
+
+# Префикс шаблона поиска, включающий регулярные выражения вместо glob
+REGEX_PREFIX = "re:"
+
+# Встроенные поля шаблона нового имени; именованные группы не могут их перекрывать
+TEMPLATE_FIELDS = ("n", "name", "ext", "date", "mtime")
+
+def plan_bulk_rename(directory, pattern, template, start=1):
+    """План массового переименования файлов папки
+    
+    pattern - glob-шаблон или регулярное выражение с префиксом "re:".
+    В template доступны поля {n} (счетчик, например {n:03d}), {name}
+    (имя без расширения), {ext} (расширение с точкой), {date} (сегодня),
+    {mtime} (время изменения, например {mtime:%Y%m%d}), а для регулярного
+    выражения - группы {1}, {2}, ... и именованные группы (кроме имен
+    встроенных полей).
+    
+    Переименовываются только файлы: папки шаблону не подставляются,
+    но их имена учитываются при проверке коллизий.
+    
+    Возвращает (план [(старое имя, новое имя)], список проблем).
+    """
+    if pattern.startswith(REGEX_PREFIX):
+        regex = re.compile(pattern[len(REGEX_PREFIX):])
+        clashes = [name for name in regex.groupindex if name in TEMPLATE_FIELDS]
+        if clashes:
+            return [], [f"Имя группы '{name}' совпадает со встроенным полем шаблона" for name in clashes]
+        match = regex.fullmatch
+    else:
+        glob = re.compile(fnmatch.translate(pattern))
+        match = glob.match
+    
+    with os.scandir(directory) as entries:
+        entries = {entry.name: entry for entry in entries}
+    names = sorted(entries)
+    existing = set(names)
+    today = datetime.now().date()
+    plan = []
+    problems = []
+    targets = {}
+    counter = start
+    for old in names:
+        if not entries[old].is_file():
+            continue
+        found = match(old)
+        if not found:
+            continue
+        stem, ext = os.path.splitext(old)
+        mtime = datetime.fromtimestamp(entries[old].stat().st_mtime)
+        fields = found.groupdict()
+        fields.update(n=counter, name=stem, ext=ext, date=today, mtime=mtime)
+        try:
+            new = template.format(found.group(0), *found.groups(), **fields)
+        except (IndexError, KeyError, ValueError, TypeError, AttributeError) as e:
+            problems.append(f"Ошибка в шаблоне для '{old}': {e}")
+            break
+        counter += 1
+        
+        if not new or new in (".", "..") or "/" in new or os.sep in new:
+            problems.append(f"Недопустимое имя '{new}' для '{old}'")
+        elif new in targets:
+            problems.append(f"'{targets[new]}' и '{old}' получают одно имя '{new}'")
+        else:
+            targets[new] = old
+        if new != old:
+            plan.append((old, new))
+    
+    # Занятое имя допустимо, только если его владелец тоже переименовывается
+    renamed = {old for old, new in plan}
+    for old, new in plan:
+        if new in existing and new not in renamed and targets.get(new) == old:
+            problems.append(f"'{new}' уже существует (для '{old}')")
+    return plan, problems
+
+def order_renames(plan, existing_names):
+    """Порядок вызовов os.rename для плана без конфликтов
+    
+    Цепочки выполняются с конца, поэтому каждое имя освобождается до того,
+    как занимается. Временное имя нужно только для разрыва цикла
+    (например, a -> b, b -> a). Возвращает список шагов (откуда, куда).
+    """
+    mapping = dict(plan)
+    # Имя, занятое еще не переименованным файлом -> кто ждет это имя
+    waiting = {new: old for old, new in mapping.items() if new in mapping}
+    ready = [old for old, new in mapping.items() if new not in mapping]
+    used = set(existing_names) | set(mapping.values())
+    steps = []
+    while mapping:
+        if ready:
+            old = ready.pop()
+            new = mapping.pop(old)
+        else:
+            # Остались только циклы: разрываем один через временное имя
+            old = next(iter(mapping))
+            target = mapping.pop(old)
+            index = 0
+            new = f".{old}.renaming"
+            while new in used:
+                index += 1
+                new = f".{old}.renaming{index}"
+            used.add(new)
+            mapping[new] = target
+            waiting[target] = new
+        steps.append((old, new))
+        blocked = waiting.pop(old, None)
+        if blocked is not None:
+            ready.append(blocked)
+    return steps
+
+def apply_bulk_rename(directory, steps):
+    """Выполнение шагов переименования как одной операции
+    
+    Если какой-то шаг не удался, выполненные шаги отменяются в обратном
+    порядке, и папка возвращается в исходное состояние (включая файлы
+    под временными именами). Возвращает число вызовов os.rename.
+    """
+    done = []
+    try:
+        for old, new in steps:
+            os.rename(os.path.join(directory, old), os.path.join(directory, new))
+            done.append((old, new))
+    except OSError:
+        for old, new in reversed(done):
+            os.rename(os.path.join(directory, new), os.path.join(directory, old))
+        raise
+    return len(steps)
+
+def bulk_rename():
+    """Массовое переименование по шаблону с предпросмотром"""
+    clear_screen()
+    print_header("МАССОВОЕ ПЕРЕИМЕНОВАНИЕ")
+    if archive_read_only():
+        return
+    print("Шаблон поиска: glob (*.jpg) или регулярное выражение (re:IMG_(\\d+)\\.jpg)")
+    print("Новое имя: {n:03d} - счетчик, {name} - имя, {ext} - расширение,")
+    print("           {date} - сегодня, {mtime:%Y%m%d} - дата изменения, {1} - группа")
+    print("-" * 60)
+    pattern = input("Шаблон поиска: ").strip()
+    template = input("Новое имя: ").strip()
+    
+    if not pattern or not template:
+        print("Ошибка: Шаблоны не могут быть пустыми!")
+        wait_for_enter()
+        return
+    
+    try:
+        plan, problems = plan_bulk_rename(working_directory, pattern, template)
+    except re.error as e:
+        print(f"❌ Ошибка в регулярном выражении: {e}")
+        wait_for_enter()
+        return
+    
+    for old, new in plan[:REPORT_LIMIT]:
+        print(f"  {old} -> {new}")
+    if len(plan) > REPORT_LIMIT:
+        print(f"  ... и еще {len(plan) - REPORT_LIMIT}")
+    
+    if problems:
+        print("\n❌ Переименование невозможно:")
+        for problem in problems[:REPORT_LIMIT]:
+            print(f"  • {problem}")
+        wait_for_enter()
+        return
+    if not plan:
+        print("Нечего переименовывать")
+        wait_for_enter()
+        return
+    
+    steps = order_renames(plan, os.listdir(working_directory))
+    print(f"\nФайлов: {len(plan)}, вызовов rename: {len(steps)}")
+    if input("Выполнить? (y/n): ").strip().lower() == "y":
+        try:
+            count = apply_bulk_rename(working_directory, steps)
+            print(f"✅ Переименовано (вызовов rename: {count})")
+        except Exception as e:
+            print(f"Ошибка при переименовании, изменения отменены: {e}")
+    
+    wait_for_enter()
+
+# ========== МАССОВОЕ СОЗДАНИЕ ПАПОК ==========
+
+# Числовой диапазон в фигурных скобках: {1..12}, {001..128}
+BRACE_RANGE = re.compile(r"^(-?\d+)\.\.(-?\d+)$")
+
+def _brace_options(body):
+    """Варианты для содержимого фигурных скобок или None, если это не шаблон"""
+    found = BRACE_RANGE.match(body)
+    if found:
+        first, last = found.groups()
+        # Ведущий ноль в границе задает ширину с дополнением нулями
+        padded = any(len(bound.lstrip("-")) > 1 and bound.lstrip("-")[0] == "0"
+                     for bound in (first, last))
+        width = max(len(first), len(last)) if padded else 0
+        step = 1 if int(first) <= int(last) else -1
+        return [str(i).zfill(width) for i in range(int(first), int(last) + step, step)]
+    
+    options = []
+    depth = 0
+    current = ""
+    for ch in body:
+        if ch == "," and depth == 0:
+            options.append(current)
+            current = ""
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+        current += ch
+    if not options:
+        return None
+    options.append(current)
+    return options
+
+def expand_braces(pattern):
+    """Раскрытие фигурных скобок как в bash
+    
+    "data/{2026..2027}/{a,b}" -> data/2026/a, data/2026/b, data/2027/a, ...
+    """
+    depth = 0
+    start = None
+    for i, ch in enumerate(pattern):
+        if ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                options = _brace_options(pattern[start + 1:i])
+                if options is None:
+                    continue
+                prefix, suffix = pattern[:start], pattern[i + 1:]
+                result = []
+                for option in options:
+                    result.extend(expand_braces(prefix + option + suffix))
+                return result
+    return [pattern]
+
+def _count_subtree(children, path):
+    """Количество папок в поддереве path (включая ее саму)"""
+    return 1 + sum(_count_subtree(children, path + (name,)) for name in children.get(path, ()))
+
+def create_folders_bulk(base, specs):
+    """Создание множества папок относительно base
+    
+    Общие родители создаются один раз, папки - по уровням (родитель раньше
+    детей), каждый родитель открывается один раз и дети создаются через
+    mkdir с dir_fd. Возвращает словарь со счетчиками created, existing,
+    failed и временем seconds.
+    """
+    started = time.perf_counter()
+    stats = {"created": 0, "existing": 0, "failed": 0, "seconds": 0.0}
+    
+    # Все нужные папки вместе с родителями, без повторов
+    needed = set()
+    for spec in specs:
+        parts = [part for part in spec.replace("\\", "/").split("/") if part not in ("", ".")]
+        if not parts or ".." in parts:
+            stats["failed"] += 1
+            continue
+        for i in range(1, len(parts) + 1):
+            needed.add(tuple(parts[:i]))
+    
+    children = {}
+    for path in needed:
+        children.setdefault(path[:-1], []).append(path[-1])
+    
+    use_dir_fd = os.mkdir in os.supports_dir_fd
+    level = [()]
+    while level:
+        next_level = []
+        for parent in level:
+            names = sorted(children.get(parent, ()))
+            if not names:
+                continue
+            parent_path = os.path.join(base, *parent)
+            try:
+                fd = os.open(parent_path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)) if use_dir_fd else None
+            except OSError:
+                stats["failed"] += sum(_count_subtree(children, parent + (name,)) for name in names)
+                continue
+            try:
+                for name in names:
+                    path = parent + (name,)
+                    try:
+                        if fd is not None:
+                            os.mkdir(name, dir_fd=fd)
+                        else:
+                            os.mkdir(os.path.join(parent_path, name))
+                        stats["created"] += 1
+                        next_level.append(path)
+                    except FileExistsError:
+                        if os.path.isdir(os.path.join(parent_path, name)):
+                            stats["existing"] += 1
+                            next_level.append(path)
+                        else:
+                            stats["failed"] += _count_subtree(children, path)
+                    except OSError:
+                        stats["failed"] += _count_subtree(children, path)
+            finally:
+                if fd is not None:
+                    os.close(fd)
+        level = next_level
+    
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+# ========== ОБХОД ДЕРЕВА И ПУЛ ПОТОКОВ ==========
+
+# Число потоков для параллельных операций с файлами
+WORKER_THREADS = min(32, (os.cpu_count() or 1) * 4)
+
+def _scan_tree_dir(path, relative, exclude):
+    """Элементы одной папки обхода: (DirEntry, относительный путь, папка?)
+    
+    Исключенные правилами exclude элементы не выдаются. Ошибка чтения
+    папки передается вызывающему.
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            rel = os.path.join(relative, entry.name) if relative else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if exclude is not None and exclude.excluded(rel, is_dir):
+                continue
+            yield entry, rel, is_dir
+
+def iter_tree(root, onerror=None, exclude=None):
+    """Обход дерева через os.scandir без перехода по ссылкам на папки
+    
+    Выдает (DirEntry, путь относительно root) для каждого элемента,
+    кроме самого root. Ошибки чтения папок передаются в onerror.
+    Элементы, исключенные правилами exclude, пропускаются вместе с
+    содержимым.
+    """
+    stack = [(root, "")]
+    while stack:
+        path, relative = stack.pop()
+        try:
+            for entry, rel, is_dir in _scan_tree_dir(path, relative, exclude):
+                yield entry, rel
+                if is_dir:
+                    stack.append((entry.path, rel))
+        except OSError as e:
+            if onerror is not None:
+                onerror(e)
+
+def parallel_walk(root, visit, new_state, workers=None, exclude=None):
+    """Обход дерева в пуле потоков с общей очередью папок
+    
+    Каждая папка - отдельная задача: прочитав ее, поток кладет подпапки
+    в общую очередь, поэтому одно большое поддерево делят все потоки.
+    Для каждого элемента вызывается visit(state, entry, rel), где state -
+    собственное состояние потока из new_state(), так что блокировки не
+    нужны. Нечитаемые папки пропускаются. Возвращает список состояний
+    потоков для слияния вызывающим.
+    
+    При прерывании (Ctrl+C) оставшиеся в очереди папки пропускаются,
+    и потоки завершаются до того, как исключение уйдет вызывающему.
+    """
+    workers = workers or WORKER_THREADS
+    tasks = queue.Queue()
+    tasks.put((root, ""))
+    states = [new_state() for _ in range(workers)]
+    errors = []
+    # Число папок в очереди и в работе: обход закончен, когда оно равно нулю
+    pending = [1]
+    pending_lock = threading.Lock()
+    done = threading.Event()
+    stop = threading.Event()
+    
+    def worker(state):
+        while True:
+            item = tasks.get()
+            if item is None:
+                return
+            try:
+                if stop.is_set():
+                    continue
+                path, relative = item
+                for entry, rel, is_dir in _scan_tree_dir(path, relative, exclude):
+                    if stop.is_set():
+                        break
+                    visit(state, entry, rel)
+                    if is_dir:
+                        with pending_lock:
+                            pending[0] += 1
+                        tasks.put((entry.path, rel))
+            except OSError:
+                pass
+            except Exception as e:
+                # Ошибку отдаем вызывающему, но очередь не останавливаем
+                errors.append(e)
+            finally:
+                with pending_lock:
+                    pending[0] -= 1
+                    if not pending[0]:
+                        done.set()
+    
+    with ThreadPoolExecutor(workers) as executor:
+        try:
+            for state in states:
+                executor.submit(worker, state)
+            # Ожидание с таймаутом: бесконечное ожидание не прерывается Ctrl+C
+            while not done.wait(0.1):
+                pass
+        finally:
+            # Без сигналов остановки выход из пула ждал бы потоки вечно
+            stop.set()
+            for _ in states:
+                tasks.put(None)
+    if errors:
+        raise errors[0]
+    return states
+
+def parallel_imap(func, items, workers=None):
+    """Применение func к items в пуле потоков
+    
+    Результаты выдаются по мере готовности, без сохранения порядка.
+    В работе одновременно не больше workers * 4 задач, поэтому items
+    может быть ленивым генератором любой длины.
+    """
+    workers = workers or WORKER_THREADS
+    with ThreadPoolExecutor(workers) as executor:
+        pending = set()
+        for item in items:
+            pending.add(executor.submit(func, item))
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+# ========== ПРАВА ДОСТУПА И ВЛАДЕЛЕЦ ==========
+
+def parse_mode(text):
+    """Разбор восьмеричных прав доступа ("755", "0644")"""
+    mode = int(text, 8)
+    if not 0 <= mode <= 0o7777:
+        raise ValueError(f"Недопустимые права: {text}")
+    return mode
+
+def parse_owner(text):
+    """Разбор владельца "user:group", "user" или ":group" в (uid, gid)
+    
+    -1 означает "не менять". Допускаются имена и числовые id.
+    """
+    user, _, group = text.partition(":")
+    uid = gid = -1
+    if user:
+        if user.isdigit():
+            uid = int(user)
+        else:
+            import pwd
+            uid = pwd.getpwnam(user).pw_uid
+    if group:
+        if group.isdigit():
+            gid = int(group)
+        else:
+            import grp
+            gid = grp.getgrnam(group).gr_gid
+    return uid, gid
+
+def _change_entry(task):
+    """Применение chmod/chown к одному элементу; True при успехе"""
+    path, mode, uid, gid = task
+    try:
+        if mode is not None:
+            os.chmod(path, mode)
+        if uid != -1 or gid != -1:
+            os.chown(path, uid, gid, follow_symlinks=False)
+        return True
+    except OSError:
+        return False
+
+def change_permissions_tree(root, mode=None, uid=-1, gid=-1):
+    """Рекурсивная смена прав и/или владельца в пуле потоков
+    
+    Элементы, у которых права и владелец уже совпадают (по stat из обхода
+    os.scandir), пропускаются без системных вызовов. Права ссылок не
+    меняются. Возвращает словарь со счетчиками changed, unchanged, failed.
+    
+    Файлы меняются во время обхода, а папки - после него, начиная с самых
+    глубоких: права без r/x на папке не мешают ни прочитать ее, ни
+    поменять ее содержимое.
+    """
+    stats = {"changed": 0, "unchanged": 0, "failed": 0}
+    # Глубина -> задачи для папок, отложенные до конца обхода
+    directories = {}
+    
+    def onerror(error):
+        stats["failed"] += 1
+    
+    def candidates():
+        root_stat = os.lstat(root)
+        items = [(root, "", root_stat)]
+        if stat.S_ISDIR(root_stat.st_mode):
+            items = itertools.chain(items, ((entry.path, rel, entry.stat(follow_symlinks=False))
+                                            for entry, rel in iter_tree(root, onerror)))
+        for path, rel, st in items:
+            new_mode = mode
+            if mode is None or stat.S_ISLNK(st.st_mode) or stat.S_IMODE(st.st_mode) == mode:
+                new_mode = None
+            new_uid = uid if uid != -1 and st.st_uid != uid else -1
+            new_gid = gid if gid != -1 and st.st_gid != gid else -1
+            if new_mode is None and new_uid == -1 and new_gid == -1:
+                stats["unchanged"] += 1
+            elif stat.S_ISDIR(st.st_mode):
+                depth = rel.count(os.sep) + 1 if rel else 0
+                directories.setdefault(depth, []).append((path, new_mode, new_uid, new_gid))
+            else:
+                yield path, new_mode, new_uid, new_gid
+    
+    for ok in parallel_imap(_change_entry, candidates()):
+        stats["changed" if ok else "failed"] += 1
+    for depth in sorted(directories, reverse=True):
+        for ok in parallel_imap(_change_entry, directories.pop(depth)):
+            stats["changed" if ok else "failed"] += 1
+    return stats
+
+def permissions_item():
+    """Смена прав доступа и владельца (рекурсивно для папок)"""
+    clear_screen()
+    print_header("ПРАВА ДОСТУПА И ВЛАДЕЛЕЦ")
+    if archive_read_only():
+        return
+    item_name = input("Введите название файла или папки: ").strip()
+    
+    if not item_name:
+        print("Ошибка: Имя не может быть пустым!")
+        wait_for_enter()
+        return
+    
+    item_path = os.path.join(working_directory, item_name)
+    
+    if not os.path.lexists(item_path):
+        print(f"Ошибка: '{item_name}' не найден!")
+        wait_for_enter()
+        return
+    
+    mode_text = input("Права (например 755, Enter - не менять): ").strip()
+    owner_text = input("Владелец (user:group, Enter - не менять): ").strip()
+    
+    if not mode_text and not owner_text:
+        print("Ошибка: Нужно указать права или владельца!")
+        wait_for_enter()
+        return
+    
+    try:
+        mode = parse_mode(mode_text) if mode_text else None
+        uid, gid = parse_owner(owner_text) if owner_text else (-1, -1)
+        stats = change_permissions_tree(item_path, mode, uid, gid)
+        print(f"Изменено: {stats['changed']}, без изменений: {stats['unchanged']}, "
+              f"ошибок: {stats['failed']}")
+    except (ValueError, KeyError, ImportError) as e:
+        print(f"❌ Некорректное значение: {e}")
+    except Exception as e:
+        print(f"Ошибка при смене прав: {e}")
+    
+    wait_for_enter()
+
+# ========== КОНТРОЛЬНЫЕ СУММЫ ==========
+
+# Алгоритм и буфер чтения для контрольных сумм
+HASH_ALGORITHM = "sha256"
+HASH_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Файл кэша сумм: (устройство, inode, размер, mtime) -> сумма
+HASH_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".file_manager_hashes")
+
+# Сколько записей хранить в кэше сумм
+HASH_CACHE_LIMIT = 1000000
+
+# Кэш сумм в памяти (загружается при первом обращении)
+_hash_cache = None
+_hash_cache_dirty = False
+_hash_cache_lock = threading.Lock()
+
+def hash_file(path, direct=False):
+    """Контрольная сумма файла, читаемого большими блоками
+    
+    При direct файл читается с O_DIRECT в обход кэша страниц (если ФС это
+    поддерживает).
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    fd = _open_direct(path, os.O_RDONLY) if direct and hasattr(os, "O_DIRECT") else None
+    if fd is None:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    # Буфер из mmap выровнен по странице, как требует O_DIRECT
+    buffer = mmap.mmap(-1, HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    try:
+        with open(fd, 'rb', buffering=0) as f:
+            _fadvise(fd, 0, 0, getattr(os, "POSIX_FADV_SEQUENTIAL", 0))
+            while True:
+                n = f.readinto(view)
+                if not n:
+                    break
+                digest.update(view[:n])
+    finally:
+        view.release()
+        buffer.close()
+    return digest.hexdigest()
+
+def _load_hash_cache():
+    """Загрузка кэша сумм с диска (один раз за сессию)"""
+    global _hash_cache
+    if _hash_cache is None:
+        cache = {}
+        try:
+            with open(HASH_CACHE_FILE, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 6:
+                        cache[(parts[0], int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4]))] = parts[5]
+        except (OSError, ValueError):
+            pass
+        _hash_cache = cache
+    return _hash_cache
+
+def save_hash_cache():
+    """Сохранение кэша сумм, если он изменился (через временный файл)"""
+    global _hash_cache_dirty
+    if not _hash_cache_dirty:
+        return
+    with _hash_cache_lock:
+        items = list(_hash_cache.items())[-HASH_CACHE_LIMIT:]
+        _hash_cache_dirty = False
+    temp_path = HASH_CACHE_FILE + ".tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for (algorithm, dev, ino, size, mtime), digest in items:
+                f.write(f"{algorithm} {dev} {ino} {size} {mtime} {digest}\n")
+        os.replace(temp_path, HASH_CACHE_FILE)
+    except OSError:
+        pass
+
+def cached_hash(path):
+    """Контрольная сумма с кэшем по (устройство, inode, размер, mtime)
+    
+    Неизменившийся файл повторно не читается.
+    """
+    global _hash_cache_dirty
+    st = os.stat(path)
+    key = (HASH_ALGORITHM, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    cache = _load_hash_cache()
+    digest = cache.get(key)
+    if digest is None:
+        digest = hash_file(path)
+        after = os.stat(path)
+        # Файл менялся во время чтения - такую сумму не запоминаем
+        if (after.st_size, after.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+            with _hash_cache_lock:
+                cache[key] = digest
+                _hash_cache_dirty = True
+    return digest
+
+def _hash_task(task):
+    """Задача для пула: (путь, относительный путь) -> (отн. путь, сумма, ошибка)"""
+    path, rel = task
+    try:
+        return rel, cached_hash(path), None
+    except OSError as e:
+        return rel, None, e
+
+def build_manifest(root, manifest_path):
+    """Создание манифеста сумм всех файлов под root
+    
+    Файлы хэшируются в пуле потоков, строки манифеста отсортированы
+    и совместимы с sha256sum. Возвращает (число файлов, список ошибок).
+    """
+    skip = os.path.abspath(manifest_path)
+    tasks = ((entry.path, rel) for entry, rel in iter_tree(root)
+             if entry.is_file(follow_symlinks=False) and os.path.abspath(entry.path) != skip)
+    lines = []
+    errors = []
+    for rel, digest, error in parallel_imap(_hash_task, tasks):
+        if error is not None:
+            errors.append(f"{rel}: {error}")
+        else:
+            lines.append((rel.replace(os.sep, "/"), digest))
+    lines.sort()
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        for rel, digest in lines:
+            f.write(f"{digest}  {rel}\n")
+    save_hash_cache()
+    return len(lines), errors
+
+def verify_manifest(root, manifest_path):
+    """Проверка файлов под root по манифесту
+    
+    Возвращает словарь: ok - число совпавших, mismatched - список
+    несовпавших путей, missing - список отсутствующих путей.
+    """
+    tasks = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        expected = {}
+        for line in f:
+            digest, sep, rel = line.rstrip("\n").partition("  ")
+            if sep:
+                expected[rel] = digest
+                tasks.append((os.path.join(root, *rel.split("/")), rel))
+    
+    result = {"ok": 0, "mismatched": [], "missing": []}
+    for rel, digest, error in parallel_imap(_hash_task, tasks):
+        if error is not None:
+            result["missing"].append(rel)
+        elif digest != expected[rel]:
+            result["mismatched"].append(rel)
+        else:
+            result["ok"] += 1
+    result["mismatched"].sort()
+    result["missing"].sort()
+    save_hash_cache()
+    return result
+
+def manifest_item():
+    """Создание и проверка манифеста контрольных сумм папки"""
+    clear_screen()
+    print_header("КОНТРОЛЬНЫЕ СУММЫ")
+    if archive_read_only():
+        return
+    print("1. Создать манифест")
+    print("2. Проверить по манифесту")
+    print("-" * 60)
+    action = input("Выберите действие: ").strip()
+    if action not in ("1", "2"):
+        print("❌ Неверный пункт меню!")
+        wait_for_enter()
+        return
+    
+    folder_name = input("Папка (Enter - рабочая директория): ").strip()
+    root = os.path.normpath(os.path.join(working_directory, folder_name))
+    if not os.path.isdir(root):
+        print(f"Ошибка: папка '{folder_name}' не найдена!")
+        wait_for_enter()
+        return
+    
+    default_name = (os.path.basename(root) or "manifest") + "." + HASH_ALGORITHM
+    manifest_name = input(f"Файл манифеста (Enter - {default_name}): ").strip() or default_name
+    manifest_path = os.path.join(working_directory, manifest_name)
+    
+    started = time.perf_counter()
+    try:
+        if action == "1":
+            count, errors = build_manifest(root, manifest_path)
+            print(f"✅ Манифест записан: {count} файлов ({time.perf_counter() - started:.2f} с)")
+            for error in errors[:REPORT_LIMIT]:
+                print(f"  ❌ {error}")
+        else:
+            result = verify_manifest(root, manifest_path)
+            print(f"Совпало: {result['ok']}, не совпало: {len(result['mismatched'])}, "
+                  f"отсутствует: {len(result['missing'])} ({time.perf_counter() - started:.2f} с)")
+            for rel in result["mismatched"][:REPORT_LIMIT]:
+                print(f"  ❌ изменен: {rel}")
+            for rel in result["missing"][:REPORT_LIMIT]:
+                print(f"  ❌ отсутствует: {rel}")
+    except Exception as e:
+        print(f"Ошибка: {e}")
+    
+    wait_for_enter()
+
+# ========== СРАВНЕНИЕ ПАПОК ==========
+
+# Обозначения результатов сравнения папок
+DIFF_MARKS = {
+    "only_left": "<",
+    "only_right": ">",
+    "different": "≠",
+    "same": "=",
+    "error": "!",
+}
+
+def _scan_entries(path):
+    """Содержимое папки в виде словаря имя -> DirEntry (None, если не читается)"""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name: entry for entry in entries}
+    except OSError:
+        return None
+
+def _compare_contents(task):
+    """Сравнение содержимого двух файлов одного размера по суммам"""
+    rel, left_path, right_path = task
+    try:
+        same = cached_hash(left_path) == cached_hash(right_path)
+        return ("same" if same else "different"), rel
+    except OSError:
+        return "error", rel
+
+def compare_trees(left, right, deep=True, workers=None):
+    """Потоковое сравнение двух деревьев папок
+    
+    Оба дерева обходятся одновременно, элементы сопоставляются по
+    относительному пути. Файлы сначала сравниваются по размеру и времени
+    изменения; содержимое хэшируется в пуле потоков, только если размер
+    совпал, а время - нет (и deep включен). Выдает пары (статус, путь)
+    по мере готовности: only_left, only_right, same, different, error.
+    Папка, которая есть только с одной стороны, выдается одной записью;
+    папка, которую не удалось прочитать, - записью error.
+    """
+    workers = workers or WORKER_THREADS
+    with ThreadPoolExecutor(workers) as executor:
+        pending = set()
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            left_entries = _scan_entries(os.path.join(left, rel_dir))
+            right_entries = _scan_entries(os.path.join(right, rel_dir))
+            if left_entries is None or right_entries is None:
+                # Нечитаемая папка - ошибка, а не пустое совпадение
+                yield "error", rel_dir or os.curdir
+                continue
+            for name in sorted(left_entries.keys() | right_entries.keys()):
+                rel = os.path.join(rel_dir, name) if rel_dir else name
+                left_entry = left_entries.get(name)
+                right_entry = right_entries.get(name)
+                if right_entry is None:
+                    yield "only_left", rel
+                    continue
+                if left_entry is None:
+                    yield "only_right", rel
+                    continue
+                
+                left_dir = left_entry.is_dir(follow_symlinks=False)
+                if left_dir != right_entry.is_dir(follow_symlinks=False):
+                    yield "different", rel
+                    continue
+                if left_dir:
+                    stack.append(rel)
+                    continue
+                
+                try:
+                    left_stat, right_stat = left_entry.stat(), right_entry.stat()
+                except OSError:
+                    yield "error", rel
+                    continue
+                if left_stat.st_size != right_stat.st_size:
+                    yield "different", rel
+                # Целые секунды: не все ФС хранят время точнее
+                elif int(left_stat.st_mtime) == int(right_stat.st_mtime):
+                    yield "same", rel
+                elif not deep:
+                    yield "different", rel
+                else:
+                    pending.add(executor.submit(_compare_contents, (rel, left_entry.path, right_entry.path)))
+                    if len(pending) >= workers * 4:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future.result()
+            
+            # Отдаем уже готовые результаты, не дожидаясь остальных
+            done, pending = wait(pending, timeout=0)
+            for future in done:
+                yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+    save_hash_cache()
+
+def compare_folders():
+    """Сравнение двух папок с потоковым выводом различий"""
+    clear_screen()
+    print_header("СРАВНЕНИЕ ПАПОК")
+    left_name = input("Первая папка: ").strip()
+    right_name = input("Вторая папка: ").strip()
+    
+    if not left_name or not right_name:
+        print("Ошибка: Имя не может быть пустым!")
+        wait_for_enter()
+        return
+    
+    left = os.path.join(working_directory, left_name)
+    right = os.path.join(working_directory, right_name)
+    for name, path in ((left_name, left), (right_name, right)):
+        if not os.path.isdir(path):
+            print(f"Ошибка: папка '{name}' не найдена!")
+            wait_for_enter()
+            return
+    
+    report_name = input("Файл для отчета (Enter - вывод на экран): ").strip()
+    report = None
+    if report_name:
+        try:
+            report = open(os.path.join(working_directory, report_name), 'w', encoding='utf-8')
+        except OSError as e:
+            print(f"Ошибка: не удалось создать отчет: {e}")
+            wait_for_enter()
+            return
+    print(f"Обозначения: < только в '{left_name}', > только в '{right_name}', ≠ различаются")
+    print("-" * 60)
+    
+    counts = dict.fromkeys(DIFF_MARKS, 0)
+    try:
+        for status, rel in compare_trees(left, right):
+            counts[status] += 1
+            if status == "same":
+                continue
+            line = f"{DIFF_MARKS[status]} {rel}"
+            if report:
+                report.write(line + "\n")
+            else:
+                print(line)
+    except Exception as e:
+        print(f"Ошибка при сравнении: {e}")
+    finally:
+        if report:
+            report.close()
+    
+    print("-" * 60)
+    print(f"Одинаковых: {counts['same']}, различающихся: {counts['different']}, "
+          f"только слева: {counts['only_left']}, только справа: {counts['only_right']}, "
+          f"ошибок: {counts['error']}")
+    wait_for_enter()
+
+# ========== СРАВНЕНИЕ ФАЙЛОВ ==========
+
+# Размер блока при побайтовом сравнении файлов
+COMPARE_BUFFER_SIZE = 1024 * 1024
+
+def _first_difference(a, b):
+    """Индекс первого различающегося байта двух одинаковых по длине блоков
+    
+    Двоичный поиск сравнением срезов: memcmp вместо цикла по байтам.
+    """
+    low, high = 0, len(a)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle
+    return low
+
+def compare_files(path_a, path_b):
+    """Сравнение двух файлов с выходом на первом различии
+    
+    Сначала сравниваются размеры, затем блоки, прочитанные readinto в
+    заранее выделенные буферы; память не зависит от размера файлов.
+    Возвращает ("same", None), ("size", None) или ("content", смещение).
+    """
+    size_a = os.path.getsize(path_a)
+    size_b = os.path.getsize(path_b)
+    if size_a != size_b:
+        return "size", None
+    if os.path.samefile(path_a, path_b):
+        return "same", None
+    
+    buffer_a = bytearray(COMPARE_BUFFER_SIZE)
+    buffer_b = bytearray(COMPARE_BUFFER_SIZE)
+    view_a = memoryview(buffer_a)
+    view_b = memoryview(buffer_b)
+    offset = 0
+    with open(path_a, 'rb', buffering=0) as file_a, open(path_b, 'rb', buffering=0) as file_b:
+        for f in (file_a, file_b):
+            _fadvise(f.fileno(), 0, 0, getattr(os, "POSIX_FADV_SEQUENTIAL", 0))
+        while True:
+            n = file_a.readinto(view_a)
+            # readinto может вернуть меньше запрошенного - дочитываем до n
+            m = 0
+            while m < n:
+                got = file_b.readinto(view_b[m:n])
+                if not got:
+                    break
+                m += got
+            if not n:
+                return "same", None
+            if m < n:
+                # Второй файл укоротился во время сравнения
+                return "size", None
+            if view_a[:n] != view_b[:n]:
+                return "content", offset + _first_difference(view_a[:n], view_b[:n])
+            offset += n
+
+def compare_files_item():
+    """Сравнение двух файлов"""
+    clear_screen()
+    print_header("СРАВНЕНИЕ ФАЙЛОВ")
+    first_name = input("Первый файл: ").strip()
+    second_name = input("Второй файл: ").strip()
+    
+    if not first_name or not second_name:
+        print("Ошибка: Имя не может быть пустым!")
+        wait_for_enter()
+        return
+    
+    first = os.path.join(working_directory, first_name)
+    second = os.path.join(working_directory, second_name)
+    for name, path in ((first_name, first), (second_name, second)):
+        if not os.path.isfile(path):
+            print(f"Ошибка: файл '{name}' не найден!")
+            wait_for_enter()
+            return
+    
+    try:
+        started = time.perf_counter()
+        status, offset = compare_files(first, second)
+        elapsed = time.perf_counter() - started
+        if status == "same":
+            print(f"✅ Файлы одинаковые ({elapsed:.3f} с)")
+        elif status == "size":
+            print(f"❌ Размеры различаются: {os.path.getsize(first)} и {os.path.getsize(second)} байт")
+        else:
+            print(f"❌ Первое различие на смещении {offset} (0x{offset:x}) ({elapsed:.3f} с)")
+    except Exception as e:
+        print(f"Ошибка при сравнении: {e}")
+    
+    wait_for_enter()
+
+# ========== ПРОСМОТР ФАЙЛОВ ==========
+
+# Сколько строк показывать в начале/конце файла
+PREVIEW_LINES = 20
+
+# Сколько байт максимум просматривать при поиске строк (защита от файлов без переводов строк)
+PREVIEW_MAX_BYTES = 64 * 1024
+
+# Интервал опроса файла, если inotify недоступен (секунды)
+FOLLOW_POLL_INTERVAL = 0.5
+
+# Сколько новых байт читать за раз при слежении за файлом
+FOLLOW_READ_CHUNK = 1024 * 1024
+
+# Константы inotify (Linux)
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_MOVE_SELF = 0x800
+IN_DELETE_SELF = 0x400
+IN_NONBLOCK = getattr(os, "O_NONBLOCK", 0)
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+def _decode_lines(data):
+    """Перевод байтов в строки без падения на битой кодировке"""
+    return data.decode('utf-8', errors='replace').splitlines()
+
+def read_head(path, count=PREVIEW_LINES):
+    """Первые count строк файла
+    
+    Файл отображается через mmap, читаются только страницы до нужной строки.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            limit = min(size, PREVIEW_MAX_BYTES)
+            end = 0
+            for _ in range(count):
+                position = mm.find(b"\n", end, limit)
+                if position < 0:
+                    end = limit
+                    break
+                end = position + 1
+            return _decode_lines(mm[:end])
+
+def read_tail(path, count=PREVIEW_LINES):
+    """Последние count строк файла
+    
+    Поиск переводов строк идет с конца через mmap, поэтому время не
+    зависит от размера файла.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            floor = max(0, size - PREVIEW_MAX_BYTES)
+            # Перевод строки в самом конце файла не начинает новую строку
+            search_end = size - 1 if mm[size - 1:size] == b"\n" else size
+            start = floor
+            for _ in range(count):
+                position = mm.rfind(b"\n", floor, search_end)
+                if position < 0:
+                    start = floor
+                    break
+                start = position + 1
+                search_end = position
+            return _decode_lines(mm[start:size])
+
+class FileWatcher:
+    """Ожидание изменений файла: inotify на Linux, иначе опрос по таймеру"""
+    
+    def __init__(self, path):
+        self.fd = None
+        self.libc = None
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+                fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+                if fd >= 0:
+                    mask = IN_MODIFY | IN_ATTRIB | IN_MOVE_SELF | IN_DELETE_SELF
+                    if libc.inotify_add_watch(fd, os.fsencode(path), mask) >= 0:
+                        self.fd = fd
+                    else:
+                        os.close(fd)
+            except (OSError, AttributeError):
+                pass
+    
+    def wait(self, timeout):
+        """Ожидание события (или таймаута)"""
+        if self.fd is None:
+            time.sleep(timeout)
+            return
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            try:
+                os.read(self.fd, 4096)
+            except BlockingIOError:
+                pass
+    
+    def close(self):
+        """Освобождение дескриптора inotify"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+def follow_file(path, stop=None, timeout=FOLLOW_POLL_INTERVAL):
+    """Слежение за дописываемым файлом (как tail -f)
+    
+    Читаются только новые байты после текущей позиции, блоками не больше
+    FOLLOW_READ_CHUNK; выдаются полные строки по мере появления. При
+    усечении файла чтение начинается сначала, при замене (ротации логов)
+    файл открывается заново; недописанная строка старого файла отбрасывается.
+    stop - функция, вернувшая True, завершает слежение.
+    """
+    f = open(path, 'rb')
+    position = os.fstat(f.fileno()).st_size
+    watcher = FileWatcher(path)
+    pending = b""
+    try:
+        while stop is None or not stop():
+            st = os.fstat(f.fileno())
+            if st.st_size < position:
+                position = 0
+                pending = b""
+            if st.st_size > position:
+                f.seek(position)
+                data = f.read(min(st.st_size - position, FOLLOW_READ_CHUNK))
+                position += len(data)
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    yield line.decode('utf-8', errors='replace')
+                continue
+            
+            try:
+                replaced = os.stat(path).st_ino != st.st_ino
+            except FileNotFoundError:
+                replaced = False
+            if replaced:
+                f.close()
+                f = open(path, 'rb')
+                position = 0
+                pending = b""
+                watcher.close()
+                watcher = FileWatcher(path)
+                continue
+            watcher.wait(timeout)
+    finally:
+        watcher.close()
+        f.close()
+
+def view_file_lines(path, mode):
+    """Вывод начала или конца файла"""
+    clear_screen()
+    print_header("НАЧАЛО ФАЙЛА" if mode == "head" else "КОНЕЦ ФАЙЛА")
+    print(path)
+    print("-" * 60)
+    try:
+        lines = read_head(path) if mode == "head" else read_tail(path)
+        for line in lines:
+            print(line)
+        if not lines:
+            print("Файл пуст")
+    except Exception as e:
+        print(f"Ошибка при чтении файла: {e}")
+    wait_for_enter()
+
+def follow_file_screen(path):
+    """Слежение за файлом до нажатия Ctrl+C"""
+    clear_screen()
+    print_header("СЛЕЖЕНИЕ ЗА ФАЙЛОМ")
+    print(f"{path}\n(Ctrl+C - остановить)")
+    print("-" * 60)
+    try:
+        for line in read_tail(path):
+            print(line)
+        for line in follow_file(path):
+            print(line)
+    except KeyboardInterrupt:
+        print("\nСлежение остановлено")
+    except Exception as e:
+        print(f"Ошибка при чтении файла: {e}")
+    wait_for_enter()
+
+def file_actions(path):
+    """Меню действий с выбранным файлом"""
+    while True:
+        clear_screen()
+        print_header("ДЕЙСТВИЯ С ФАЙЛОМ")
+        print(f"Файл: {os.path.basename(path)}")
+        print("-" * 60)
+        print("1. Начало файла")
+        print("2. Конец файла")
+        print("3. Следить за файлом (tail -f)")
+        print("4. Hex-просмотр")
+        print("5. Разбить на части")
+        print("6. Склеить части (для файлов *.part001)")
+        print("0. Назад")
+        print("-" * 60)
+        
+        choice = input("Выберите действие: ").strip()
+        if choice == "1":
+            view_file_lines(path, "head")
+        elif choice == "2":
+            view_file_lines(path, "tail")
+        elif choice == "3":
+            follow_file_screen(path)
+        elif choice == "4":
+            hex_view(path)
+        elif choice == "5":
+            split_file_screen(path)
+        elif choice == "6":
+            join_files_screen(path)
+        elif choice == "0" or not choice:
+            break
+        else:
+            print("❌ Неверный пункт меню!")
+            wait_for_enter()
+
+# ========== HEX-ПРОСМОТР ==========
+
+# Байт в строке и строк на экране hex-просмотра
+HEX_ROW_BYTES = 16
+HEX_PAGE_ROWS = 16
+
+# Размер участка файла, просматриваемого за один шаг поиска
+SEARCH_CHUNK_SIZE = 64 * 1024 * 1024
+
+def format_hex_rows(data, offset, rows=HEX_PAGE_ROWS):
+    """Строки hex-дампа для окна [offset, offset + rows * 16)
+    
+    data - bytes или mmap; читается только видимое окно.
+    """
+    lines = []
+    end = min(len(data), offset + rows * HEX_ROW_BYTES)
+    for row_start in range(offset, end, HEX_ROW_BYTES):
+        row = data[row_start:min(row_start + HEX_ROW_BYTES, end)]
+        hex_part = " ".join(f"{byte:02x}" for byte in row)
+        text_part = "".join(chr(byte) if 32 <= byte < 127 else "." for byte in row)
+        lines.append(f"{row_start:010x}  {hex_part:<{HEX_ROW_BYTES * 3 - 1}}  |{text_part}|")
+    return lines
+
+def find_bytes(data, pattern, start=0, chunk_size=None):
+    """Поиск последовательности байт начиная с start, участками по chunk_size
+    
+    Участки перекрываются на len(pattern) - 1 байт, чтобы не пропустить
+    совпадение на границе. Возвращает смещение или -1.
+    """
+    chunk_size = chunk_size or SEARCH_CHUNK_SIZE
+    size = len(data)
+    position = start
+    while position < size:
+        end = min(size, position + chunk_size + len(pattern) - 1)
+        found = data.find(pattern, position, end)
+        if found >= 0:
+            return found
+        position += chunk_size
+    return -1
+
+def parse_offset(text):
+    """Разбор смещения: десятичное или шестнадцатеричное с префиксом 0x"""
+    return int(text, 16) if text.lower().startswith("0x") else int(text)
+
+def hex_view(path):
+    """Hex/ASCII просмотр файла с переходом по смещению и поиском"""
+    try:
+        f = open(path, 'rb')
+    except OSError as e:
+        print(f"Ошибка при открытии файла: {e}")
+        wait_for_enter()
+        return
+    
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            print("Файл пуст")
+            wait_for_enter()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            page = HEX_ROW_BYTES * HEX_PAGE_ROWS
+            offset = 0
+            message = ""
+            while True:
+                clear_screen()
+                print_header("HEX-ПРОСМОТР")
+                print(f"{os.path.basename(path)}: {size} байт, смещение {offset} (0x{offset:x})")
+                print("-" * 60)
+                for line in format_hex_rows(mm, offset):
+                    print(line)
+                print("-" * 60)
+                if message:
+                    print(message)
+                    message = ""
+                print("Enter/n - дальше, p - назад, g <смещение> - переход,")
+                print("/ <текст> - поиск текста, x <hex> - поиск байт, q - выход")
+                command = input("> ").strip()
+                
+                if command in ("", "n"):
+                    offset = min(offset + page, max(0, size - 1) // HEX_ROW_BYTES * HEX_ROW_BYTES)
+                elif command == "p":
+                    offset = max(0, offset - page)
+                elif command == "q":
+                    break
+                elif command.startswith("g "):
+                    try:
+                        target = parse_offset(command[2:].strip())
+                        if not 0 <= target < size:
+                            raise ValueError
+                        offset = target // HEX_ROW_BYTES * HEX_ROW_BYTES
+                    except ValueError:
+                        message = "❌ Некорректное смещение!"
+                elif command.startswith(("/ ", "x ")):
+                    try:
+                        if command[0] == "x":
+                            pattern = bytes.fromhex(command[2:])
+                        else:
+                            pattern = command[2:].encode('utf-8')
+                    except ValueError:
+                        message = "❌ Некорректная последовательность байт!"
+                        continue
+                    if not pattern:
+                        continue
+                    found = find_bytes(mm, pattern, offset + 1)
+                    if found < 0:
+                        message = "Не найдено"
+                    else:
+                        offset = found // HEX_ROW_BYTES * HEX_ROW_BYTES
+                        message = f"Найдено на смещении {found} (0x{found:x})"
+                else:
+                    message = "❌ Неизвестная команда!"
+
+# ========== РАЗБИЕНИЕ И СКЛЕЙКА ФАЙЛОВ ==========
+
+# Множители суффиксов размера: 100M, 2G
+SIZE_SUFFIXES = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+# Имя части: исходное имя + .part001
+PART_PATTERN = re.compile(r"^(?P<base>.+)\.part(?P<number>\d+)$")
+
+def parse_size(text):
+    """Разбор размера с суффиксом K/M/G/T ("100M" -> 104857600)"""
+    text = text.strip().upper().rstrip("B")
+    multiplier = SIZE_SUFFIXES.get(text[-1:], 1)
+    if text[-1:] in SIZE_SUFFIXES:
+        text = text[:-1]
+    size = int(float(text) * multiplier)
+    if size <= 0:
+        raise ValueError("Размер должен быть положительным")
+    return size
+
+def _line_boundaries(path, lines_per_part):
+    """Смещения начала частей при разбиении по числу строк
+    
+    Файл читается один раз буфером фиксированного размера; строки внутри
+    буфера считаются bytes.count, позиция границы ищется только в буфере,
+    где она находится.
+    """
+    offsets = [0]
+    remaining = lines_per_part
+    position = 0
+    with open(path, 'rb', buffering=0) as f:
+        buffer = bytearray(COPY_CHUNK_SIZE)
+        view = memoryview(buffer)
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            count = buffer.count(b"\n", 0, n)
+            start = 0
+            while count >= remaining:
+                for _ in range(remaining):
+                    start = buffer.index(b"\n", start, n) + 1
+                count -= remaining
+                remaining = lines_per_part
+                offsets.append(position + start)
+            remaining -= count
+            position += n
+    if offsets[-1] >= position and len(offsets) > 1:
+        offsets.pop()
+    return offsets
+
+def part_name(path, number, total):
+    """Имя части номер number из total"""
+    return f"{path}.part{number:0{max(3, len(str(total)))}d}"
+
+def _write_part(task):
+    """Запись одной части: диапазон исходного файла через pread/pwrite"""
+    fd_in, part_path, offset, length = task
+    fd_out = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        _copy_fd_range(fd_in, fd_out, offset, length, out_offset=0)
+    finally:
+        os.close(fd_out)
+    return part_path
+
+def split_file(path, part_size=None, part_lines=None, workers=None):
+    """Разбиение файла на части по размеру или по числу строк
+    
+    Смещения частей вычисляются заранее, затем части пишутся параллельно
+    через os.pread/os.pwrite буфером фиксированного размера.
+    Возвращает список путей частей.
+    """
+    size = os.path.getsize(path)
+    if part_lines:
+        offsets = _line_boundaries(path, part_lines)
+    else:
+        offsets = list(range(0, max(size, 1), part_size))
+    bounds = list(zip(offsets, offsets[1:] + [size]))
+    parts = [part_name(path, i, len(bounds)) for i in range(1, len(bounds) + 1)]
+    for part in parts:
+        if os.path.exists(part):
+            raise FileExistsError(f"Часть уже существует: {part}")
+    
+    fd_in = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        tasks = [(fd_in, part, start, end - start) for part, (start, end) in zip(parts, bounds)]
+        list(parallel_imap(_write_part, tasks, workers))
+    finally:
+        os.close(fd_in)
+    return parts
+
+def find_parts(part_path):
+    """Все части файла по имени любой из них, в порядке номеров"""
+    found = PART_PATTERN.match(os.path.basename(part_path))
+    if not found:
+        raise ValueError("Имя файла не похоже на часть (*.part001)")
+    directory = os.path.dirname(part_path) or "."
+    base = found.group("base")
+    numbered = []
+    for name in os.listdir(directory):
+        match = PART_PATTERN.match(name)
+        if match and match.group("base") == base:
+            numbered.append((int(match.group("number")), os.path.join(directory, name)))
+    numbered.sort()
+    if [number for number, path in numbered] != list(range(1, len(numbered) + 1)):
+        raise ValueError("Пропущены части: номера идут не подряд")
+    return [path for number, path in numbered]
+
+def _append_file(fd_out, path, position):
+    """Дописывание файла в fd_out с позиции position; возвращает новую позицию"""
+    with open(path, 'rb') as src:
+        fd_in = src.fileno()
+        length = os.fstat(fd_in).st_size
+        copied = 0
+        if hasattr(os, "copy_file_range"):
+            # Копирование внутри ядра: данные не проходят через Python
+            try:
+                while copied < length:
+                    n = os.copy_file_range(fd_in, fd_out, length - copied, copied, position + copied)
+                    if n == 0:
+                        break
+                    copied += n
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+        if copied < length:
+            _copy_fd_range(fd_in, fd_out, copied, length - copied, out_offset=position + copied)
+    return position + length
+
+def join_files(parts, dest_path):
+    """Склейка частей в один файл (copy_file_range, иначе pread/pwrite)"""
+    fd_out = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        position = 0
+        for part in parts:
+            position = _append_file(fd_out, part, position)
+    finally:
+        os.close(fd_out)
+    return position
+
+def split_file_screen(path):
+    """Разбиение выбранного файла на части"""
+    clear_screen()
+    print_header("РАЗБИЕНИЕ ФАЙЛА")
+    print(f"Файл: {os.path.basename(path)} ({os.path.getsize(path)} байт)")
+    text = input("Размер части (например 100M) или число строк с L (например 10000L): ").strip()
+    try:
+        if text.upper().endswith("L"):
+            lines = int(text[:-1])
+            if lines <= 0:
+                raise ValueError("Число строк должно быть положительным")
+            parts = split_file(path, part_lines=lines)
+        else:
+            parts = split_file(path, part_size=parse_size(text))
+        print(f"✅ Создано частей: {len(parts)}")
+        for part in parts[:REPORT_LIMIT]:
+            print(f"  {os.path.basename(part)}")
+    except ValueError as e:
+        print(f"❌ Некорректное значение: {e}")
+    except Exception as e:
+        print(f"Ошибка при разбиении: {e}")
+    wait_for_enter()
+
+def join_files_screen(path):
+    """Склейка частей, к которым относится выбранный файл"""
+    clear_screen()
+    print_header("СКЛЕЙКА ФАЙЛА")
+    try:
+        parts = find_parts(path)
+        default = PART_PATTERN.match(os.path.basename(path)).group("base")
+        print(f"Найдено частей: {len(parts)}")
+        dest_name = input(f"Имя результата (Enter - {default}): ").strip() or default
+        dest_path = os.path.join(os.path.dirname(path), dest_name)
+        size = join_files(parts, dest_path)
+        print(f"✅ Файл '{dest_name}' собран ({size} байт)")
+    except FileExistsError:
+        print("Ошибка: такой файл уже существует!")
+    except ValueError as e:
+        print(f"❌ {e}")
+    except Exception as e:
+        print(f"Ошибка при склейке: {e}")
+    wait_for_enter()
+
+# ========== ИСТОРИЯ ПАПОК ==========
+
+# Файл истории посещенных папок: строки "ранг|время|путь"
+DIRECTORY_DB_FILE = os.path.join(os.path.expanduser("~"), ".file_manager_dirs")
+
+# Предел суммы рангов: при превышении ранги уменьшаются, редкие папки удаляются
+DIRECTORY_DB_MAX_AGE = 10000
+
+# История в памяти: путь -> [ранг, время последнего посещения]
+_directory_db = None
+
+def load_directory_db():
+    """История папок из файла (загружается при первом обращении)"""
+    global _directory_db
+    if _directory_db is None:
+        db = {}
+        try:
+            with open(DIRECTORY_DB_FILE, 'r', encoding='utf-8') as f:
+                for line in f:
+                    rank, last, path = line.rstrip("\n").split("|", 2)
+                    db[path] = [float(rank), float(last)]
+        except (OSError, ValueError):
+            pass
+        _directory_db = db
+    return _directory_db
+
+def save_directory_db():
+    """Сохранение истории папок (через временный файл)"""
+    temp_path = DIRECTORY_DB_FILE + ".tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for path, (rank, last) in _directory_db.items():
+                f.write(f"{rank:g}|{last:.0f}|{path}\n")
+        os.replace(temp_path, DIRECTORY_DB_FILE)
+    except OSError:
+        pass
+
+def frecency(rank, last, now):
+    """Оценка папки: частота посещений с учетом давности"""
+    age = now - last
+    if age < 3600:
+        return rank * 4
+    if age < 86400:
+        return rank * 2
+    if age < 604800:
+        return rank / 2
+    return rank / 4
+
+def record_directory_visit(path):
+    """Учет посещения папки; старение истории при переполнении"""
+    db = load_directory_db()
+    entry = db.setdefault(path, [0.0, 0.0])
+    entry[0] += 1
+    entry[1] = time.time()
+    
+    total = sum(rank for rank, last in db.values())
+    if total > DIRECTORY_DB_MAX_AGE:
+        factor = 0.9 * DIRECTORY_DB_MAX_AGE / total
+        for key in list(db):
+            db[key][0] *= factor
+            if db[key][0] < 1:
+                del db[key]
+    save_directory_db()
+
+def _matches_keywords(path, keywords):
+    """Ключевые слова встречаются в пути по порядку, последнее - в имени папки"""
+    lowered = path.lower()
+    if keywords[-1] not in os.path.basename(lowered):
+        return False
+    position = 0
+    for keyword in keywords:
+        position = lowered.find(keyword, position)
+        if position < 0:
+            return False
+        position += len(keyword)
+    return True
+
+def find_directory(query, exclude=None):
+    """Лучшая папка из истории для части пути (как zoxide)
+    
+    Несуществующие папки удаляются из истории при поиске.
+    """
+    keywords = query.lower().split()
+    if not keywords:
+        return None
+    db = load_directory_db()
+    now = time.time()
+    best = None
+    best_score = 0
+    for path, (rank, last) in list(db.items()):
+        if path == exclude or not _matches_keywords(path, keywords):
+            continue
+        score = frecency(rank, last, now)
+        if score <= best_score:
+            continue
+        if not os.path.isdir(path):
+            del db[path]
+            continue
+        best, best_score = path, score
+    return best
+
+# ========== АВТОДОПОЛНЕНИЕ ПУТЕЙ ==========
+
+# Сколько папок держать в кэше автодополнения
+COMPLETION_CACHE_SIZE = 64
+
+# Кэш автодополнения: папка -> (mtime_ns, отсортированные имена, множество папок)
+_completion_cache = OrderedDict()
+
+# Варианты для текущего запроса readline
+_completion_matches = []
+
+def _cached_entries(directory):
+    """Отсортированные имена папки из кэша; обновляются при смене mtime папки"""
+    mtime = os.stat(directory).st_mtime_ns
+    cached = _completion_cache.get(directory)
+    if cached is not None and cached[0] == mtime:
+        _completion_cache.move_to_end(directory)
+        return cached[1], cached[2]
+    
+    names = []
+    dirs = set()
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            names.append(entry.name)
+            if entry.is_dir():
+                dirs.add(entry.name)
+    names.sort()
+    _completion_cache[directory] = (mtime, names, dirs)
+    if len(_completion_cache) > COMPLETION_CACHE_SIZE:
+        _completion_cache.popitem(last=False)
+    return names, dirs
+
+def list_completions(text, base):
+    """Варианты дополнения пути text относительно папки base
+    
+    Префикс ищется двоичным поиском по отсортированным именам, поэтому
+    даже в папках со 100 тыс. элементов дополнение мгновенное.
+    """
+    cut = max(text.rfind("/"), text.rfind(os.sep)) + 1
+    head, prefix = text[:cut], text[cut:]
+    directory = os.path.join(base, os.path.expanduser(head)) if head else base
+    try:
+        names, dirs = _cached_entries(directory)
+    except OSError:
+        return []
+    
+    matches = []
+    for i in range(bisect.bisect_left(names, prefix), len(names)):
+        name = names[i]
+        if not name.startswith(prefix):
+            break
+        matches.append(head + name + ("/" if name in dirs else ""))
+    return matches
+
+def complete_path(text, state):
+    """Функция дополнения для readline (state - номер варианта)"""
+    global _completion_matches
+    if state == 0:
+        _completion_matches = list_completions(text, working_directory)
+    return _completion_matches[state] if state < len(_completion_matches) else None
+
+def setup_completion():
+    """Включение дополнения путей по Tab во всех запросах ввода"""
+    if readline is None:
+        return
+    readline.set_completer(complete_path)
+    # Пробелы допустимы в именах, ';' разделяет пути при создании папок
+    readline.set_completer_delims("\t\n;")
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+# ========== ПРЕДЗАГРУЗКА СПИСКОВ ПАПОК ==========
+
+# Сколько списков папок держать в памяти
+LISTING_CACHE_SIZE = 256
+
+# Сколько секунд предзагруженный список считается свежим
+# (размеры файлов меняются без mtime папки)
+LISTING_CACHE_TTL = 30
+
+# Сколько соседних папок читать заранее после перехода
+PREFETCH_LIMIT = 32
+
+# Кэш списков: путь -> (mtime_ns папки, время чтения, список, предзагружен?)
+_listing_cache = OrderedDict()
+_listing_lock = threading.Lock()
+
+# Номер текущей предзагрузки; устаревшие потоки завершаются сами
+_prefetch_generation = 0
+
+def scan_directory(path):
+    """Чтение папки в EntryStore"""
+    store = EntryStore()
+    with os.scandir(path) as entries:
+        for entry in entries:
+            append_entry(store, entry.name, entry)
+    return store
+
+def cached_listing(path, prefetch=False):
+    """Список папки из кэша, если он свежий, иначе чтение с диска
+    
+    Размер дописанного файла меняется без mtime папки, поэтому просмотр
+    папки (prefetch=False) берет из кэша только список, прочитанный
+    заранее предзагрузкой, и только один раз; дальше папка перечитывается.
+    Предзагрузка (prefetch=True) использует любой свежий список.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    with _listing_lock:
+        cached = _listing_cache.get(path)
+        if (cached is not None and cached[0] == mtime
+                and time.monotonic() - cached[1] < LISTING_CACHE_TTL
+                and (prefetch or cached[3])):
+            if not prefetch:
+                _listing_cache[path] = cached[:3] + (False,)
+            _listing_cache.move_to_end(path)
+            return cached[2]
+    
+    listing = scan_directory(path)
+    with _listing_lock:
+        _listing_cache[path] = (mtime, time.monotonic(), listing, prefetch)
+        _listing_cache.move_to_end(path)
+        while len(_listing_cache) > LISTING_CACHE_SIZE:
+            _listing_cache.popitem(last=False)
+    return listing
+
+def _lower_thread_priority():
+    """Понижение приоритета CPU и ввода-вывода текущего потока (Linux)"""
+    ioprio = _ioprio_syscall()
+    if ioprio is not None:
+        syscall, (set_number, _) = ioprio
+        syscall(set_number, IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT)
+    if sys.platform.startswith("linux") and hasattr(threading, "get_native_id"):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except OSError:
+            pass
+
+def _prefetch_worker(path, generation):
+    """Чтение подпапок и родителя папки path в кэш списков"""
+    _lower_thread_priority()
+    try:
+        listing = cached_listing(path, prefetch=True)
+    except OSError:
+        return
+    targets = [os.path.join(path, name) for name, is_dir, _, _ in listing if is_dir]
+    targets = targets[:PREFETCH_LIMIT]
+    parent = os.path.dirname(path)
+    if parent != path:
+        targets.append(parent)
+    
+    for target in targets:
+        if generation != _prefetch_generation:
+            return
+        try:
+            cached_listing(target, prefetch=True)
+        except OSError:
+            pass
+
+def prefetch_listings(path):
+    """Фоновая предзагрузка списков соседних папок после перехода в path"""
+    global _prefetch_generation
+    if not operation_settings["prefetch_listings"] or split_archive_path(path):
+        return None
+    _prefetch_generation += 1
+    thread = threading.Thread(target=_prefetch_worker, args=(path, _prefetch_generation),
+                              name="prefetch", daemon=True)
+    thread.start()
+    return thread
+
+# ========== КОМПАКТНОЕ ХРАНЕНИЕ СПИСКОВ ==========
+
+class EntryStore:
+    """Компактный список элементов папки
+    
+    Вместо кортежа и строки на каждый элемент данные лежат в столбцах
+    array (размер, занято на диске, режим, смещение имени), а все имена -
+    в одном буфере bytearray в кодировке файловой системы. Элемент
+    занимает около 30 байт плюс длину имени вместо ~200 байт для кортежа
+    с объектами. Итерация выдает кортежи (имя, папка?, файл?, размер),
+    как read_directory.
+    """
+    __slots__ = ("sizes", "allocated", "modes", "offsets", "names")
+    
+    def __init__(self):
+        self.sizes = array("q")
+        self.allocated = array("q")
+        self.modes = array("I")
+        self.offsets = array("Q", [0])
+        self.names = bytearray()
+    
+    def append(self, name, size, mode, allocated=None):
+        """Добавление элемента (allocated по умолчанию равен размеру)"""
+        self.names += os.fsencode(name)
+        self.offsets.append(len(self.names))
+        self.sizes.append(size)
+        self.allocated.append(size if allocated is None else allocated)
+        self.modes.append(mode)
+    
+    def __len__(self):
+        return len(self.sizes)
+    
+    def __getitem__(self, index):
+        return self.name(index), self.is_dir(index), self.is_file(index), self.sizes[index]
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+    
+    def _raw_name(self, index):
+        return bytes(self.names[self.offsets[index]:self.offsets[index + 1]])
+    
+    def name(self, index):
+        """Имя элемента"""
+        return os.fsdecode(self._raw_name(index))
+    
+    def is_dir(self, index):
+        return stat.S_ISDIR(self.modes[index])
+    
+    def is_file(self, index):
+        return stat.S_ISREG(self.modes[index])
+    
+    def sorted_indices(self):
+        """Номера элементов в порядке имен (байтовый порядок UTF-8 совпадает с порядком строк)
+        
+        Ключи-байты нарезаются из буфера имен один раз до сортировки, и
+        sorted берет их через list.__getitem__ без вызова Python-функции
+        на элемент. Ключи живут только во время сортировки (около 130 байт
+        на элемент); результат - массив номеров.
+        """
+        count = len(self)
+        typecode = "I" if count < 2 ** 32 else "Q"
+        names = bytes(self.names)
+        keys = [names[start:end] for start, end in zip(self.offsets, itertools.islice(self.offsets, 1, None))]
+        return array(typecode, sorted(range(count), key=keys.__getitem__))
+    
+    def total_size(self):
+        """Суммарный размер файлов"""
+        return sum(self.sizes)
+
+def entry_mode(is_dir, is_file):
+    """Режим для элемента без stat (архивы, битые ссылки)"""
+    if is_dir:
+        return stat.S_IFDIR
+    return stat.S_IFREG if is_file else 0
+
+def append_entry(store, name, entry):
+    """Добавление DirEntry в хранилище; размер считается только у файлов"""
+    try:
+        st = entry.stat()
+    except OSError:
+        # Битая ссылка: берем сведения о самой ссылке
+        st = entry.stat(follow_symlinks=False)
+    if stat.S_ISREG(st.st_mode):
+        store.append(name, st.st_size, st.st_mode, allocated_size(st))
+    else:
+        store.append(name, 0, st.st_mode)
+
+# ========== РАЗМЕР ПАПКИ И ПОИСК ==========
+
+def directory_size(root, exclude=None):
+    """Размер дерева папки без перехода по ссылкам
+    
+    Файлы каждой папки собираются в EntryStore, и размер складывается
+    по его столбцу размеров. Возвращает словарь: files, dirs, bytes, errors.
+    """
+    result = {"files": 0, "dirs": 0, "bytes": 0, "errors": 0}
+    stack = [(root, "")]
+    while stack:
+        path, relative = stack.pop()
+        files = EntryStore()
+        try:
+            for entry, rel, is_dir in _scan_tree_dir(path, relative, exclude):
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    result["errors"] += 1
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    result["dirs"] += 1
+                    stack.append((entry.path, rel))
+                elif stat.S_ISREG(st.st_mode):
+                    files.append(entry.name, st.st_size, st.st_mode)
+        except OSError:
+            result["errors"] += 1
+        result["files"] += len(files)
+        result["bytes"] += files.total_size()
+    return result
+
+def search_files(root, pattern, exclude=None):
+    """Поиск по имени в дереве папки
+    
+    Шаблон с * ? [ ] сопоставляется с именем целиком, иначе ищется
+    подстрока; регистр не учитывается. Возвращает EntryStore, где имя -
+    путь относительно root, чтобы миллионы совпадений не занимали
+    гигабайты памяти.
+    """
+    if not any(char in pattern for char in "*?["):
+        pattern = f"*{pattern}*"
+    match = re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+    
+    found = EntryStore()
+    for entry, rel in iter_tree(root, exclude=exclude):
+        if match(entry.name):
+            try:
+                append_entry(found, rel, entry)
+            except OSError:
+                continue
+    return found
+
+def folder_size_item():
+    """Подсчет размера папки"""
+    clear_screen()
+    print_header("РАЗМЕР ПАПКИ")
+    if archive_read_only():
+        return
+    folder_name = input("Папка (Enter - рабочая директория): ").strip()
+    root = os.path.normpath(os.path.join(working_directory, folder_name))
+    if not os.path.isdir(root):
+        print(f"Ошибка: папка '{folder_name}' не найдена!")
+        wait_for_enter()
+        return
+    
+    started = time.perf_counter()
+    result = directory_size(root, exclude_rules())
+    print(f"Файлов: {result['files']}, папок: {result['dirs']}")
+    print(f"Размер: {result['bytes']} байт ({result['bytes'] / 1024 ** 2:.1f} МБ)")
+    if result["errors"]:
+        print(f"❌ Не удалось прочитать: {result['errors']}")
+    print(f"Время: {time.perf_counter() - started:.2f} с")
+    wait_for_enter()
+
+def search_item():
+    """Поиск файлов и папок по имени"""
+    clear_screen()
+    print_header("ПОИСК ФАЙЛОВ")
+    if archive_read_only():
+        return
+    pattern = input("Имя или шаблон (например, *.txt): ").strip()
+    if not pattern:
+        print("❌ Шаблон не может быть пустым!")
+        wait_for_enter()
+        return
+    
+    started = time.perf_counter()
+    found = search_files(working_directory, pattern, exclude_rules())
+    print(f"Найдено: {len(found)} ({time.perf_counter() - started:.2f} с)")
+    indices = found.sorted_indices()
+    for index in indices[:REPORT_LIMIT]:
+        item_type = "📁" if found.is_dir(index) else "📄"
+        print(f"  {item_type} {found.name(index)}")
+    if len(indices) > REPORT_LIMIT:
+        print(f"  ... и еще {len(indices) - REPORT_LIMIT}")
+    wait_for_enter()
+
+# ========== МОНИТОР РЕСУРСОВ ==========
+
+# Откуда читать сведения о системе (Linux)
+PROC_ROOT = "/proc"
+SYS_BLOCK_DIR = "/sys/block"
+
+# Размер сектора в /proc/diskstats (всегда 512 байт)
+DISKSTATS_SECTOR = 512
+
+# Статические сведения о системе: считаются один раз за сессию
+_static_system_info = None
+
+def static_system_info():
+    """Неизменные сведения о системе в виде списка (название, значение)
+    
+    platform.processor() и похожие функции могут запускать внешние
+    программы, поэтому результат кэшируется.
+    """
+    global _static_system_info
+    if _static_system_info is None:
+        _static_system_info = [
+            ("Операционная система", f"{platform.system()} {platform.release()}"),
+            ("Версия", platform.version()),
+            ("Архитектура", platform.machine()),
+            ("Процессор", platform.processor()),
+            ("Имя компьютера", platform.node()),
+            ("Пользователь", os.getenv('USERNAME') or os.getenv('USER') or 'Неизвестно'),
+        ]
+    return _static_system_info
+
+def format_size(size):
+    """Размер в байтах в виде '1.5 ГБ'"""
+    for unit in ("байт", "КБ", "МБ", "ГБ"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "байт" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ТБ"
+
+def parse_cpu_times(text):
+    """Строка cpu из /proc/stat: (занятое время, общее время) в тиках"""
+    fields = [int(value) for value in text.split("\n", 1)[0].split()[1:9]]
+    idle = fields[3] + fields[4]
+    total = sum(fields)
+    return total - idle, total
+
+def parse_meminfo(text):
+    """Память из /proc/meminfo: (всего, доступно) в байтах"""
+    values = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        if name in ("MemTotal", "MemAvailable"):
+            values[name] = int(rest.split()[0]) * 1024
+    return values.get("MemTotal", 0), values.get("MemAvailable", 0)
+
+def parse_diskstats(text, devices=None):
+    """Прочитано и записано байт по /proc/diskstats (сумма по дискам devices)"""
+    read = written = 0
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 10 or (devices is not None and fields[2] not in devices):
+            continue
+        read += int(fields[5]) * DISKSTATS_SECTOR
+        written += int(fields[9]) * DISKSTATS_SECTOR
+    return read, written
+
+def parse_mounts(text):
+    """Точки монтирования реальных устройств из /proc/mounts"""
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 2 or not fields[0].startswith("/"):
+            continue
+        # Пробелы и табуляции в путях записаны как \040 и \011
+        point = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), fields[1])
+        if point not in mounts:
+            mounts.append(point)
+    return mounts
+
+class ResourceMonitor:
+    """Снимки загрузки системы из /proc и os.statvfs
+    
+    Файлы /proc открываются один раз и перечитываются через os.pread,
+    поэтому снимок стоит несколько системных вызовов. Загрузка CPU и
+    скорость диска считаются по разнице с предыдущим снимком.
+    """
+    
+    SOURCES = ("stat", "meminfo", "diskstats", "mounts")
+    
+    def __init__(self, proc_root=PROC_ROOT):
+        self._fds = {}
+        for name in self.SOURCES:
+            try:
+                self._fds[name] = os.open(os.path.join(proc_root, name), os.O_RDONLY)
+            except OSError:
+                pass
+        try:
+            # Только целые диски, иначе разделы посчитаются дважды
+            self._devices = {name for name in os.listdir(SYS_BLOCK_DIR)
+                             if not name.startswith(("loop", "ram"))}
+        except OSError:
+            self._devices = None
+        self._previous = None
+    
+    def close(self):
+        """Закрытие файлов /proc"""
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+    
+    def _read(self, name):
+        """Текущее содержимое файла /proc или None"""
+        fd = self._fds.get(name)
+        if fd is None:
+            return None
+        chunks = []
+        offset = 0
+        while True:
+            chunk = os.pread(fd, 65536, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        return b"".join(chunks).decode(errors="replace")
+    
+    def sample(self):
+        """Снимок: словарь cpu, memory, load, disk, mounts (None - нет данных)"""
+        now = time.monotonic()
+        text = self._read("stat")
+        cpu = parse_cpu_times(text) if text else None
+        text = self._read("diskstats")
+        disk = parse_diskstats(text, self._devices) if text else None
+        
+        result = {"cpu": None, "memory": None, "load": None, "disk": None, "mounts": []}
+        if self._previous is not None:
+            before, cpu_before, disk_before = self._previous
+            elapsed = max(now - before, 1e-6)
+            if cpu is not None and cpu_before is not None and cpu[1] > cpu_before[1]:
+                result["cpu"] = 100.0 * (cpu[0] - cpu_before[0]) / (cpu[1] - cpu_before[1])
+            if disk is not None and disk_before is not None:
+                result["disk"] = ((disk[0] - disk_before[0]) / elapsed,
+                                  (disk[1] - disk_before[1]) / elapsed)
+        self._previous = (now, cpu, disk)
+        
+        text = self._read("meminfo")
+        if text:
+            result["memory"] = parse_meminfo(text)
+        if hasattr(os, "getloadavg"):
+            result["load"] = os.getloadavg()
+        text = self._read("mounts")
+        for point in parse_mounts(text) if text else [os.path.abspath(os.sep)]:
+            try:
+                st = os.statvfs(point)
+            except (OSError, AttributeError):
+                continue
+            result["mounts"].append((point, st.f_blocks * st.f_frsize, st.f_bavail * st.f_frsize))
+        return result
+
+def format_sample(sample):
+    """Строки экрана монитора для снимка"""
+    lines = []
+    cpu = sample["cpu"]
+    lines.append(f"CPU: {cpu:5.1f}%" if cpu is not None else "CPU: измерение...")
+    if sample["memory"]:
+        total, available = sample["memory"]
+        lines.append(f"Память: занято {format_size(total - available)} из {format_size(total)}")
+    if sample["load"]:
+        lines.append("Средняя нагрузка: " + " ".join(f"{value:.2f}" for value in sample["load"]))
+    if sample["disk"]:
+        read, written = sample["disk"]
+        lines.append(f"Диски: чтение {format_size(read)}/с, запись {format_size(written)}/с")
+    if sample["mounts"]:
+        lines.append("Свободно на разделах:")
+        for point, total, free in sample["mounts"]:
+            lines.append(f"  {point}: {format_size(free)} из {format_size(total)}")
+    return lines
+
+def resource_monitor():
+    """Экран монитора ресурсов, обновляется до нажатия Ctrl+C"""
+    interval = max(operation_settings["monitor_interval"], 1)
+    monitor = ResourceMonitor()
+    try:
+        while True:
+            sample = monitor.sample()
+            clear_screen()
+            print_header("МОНИТОР РЕСУРСОВ")
+            print(f"Обновление каждые {interval} с (Ctrl+C - выход)")
+            print("-" * 60)
+            for line in format_sample(sample):
+                print(line)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.close()
+
+# ========== ПРОВЕРКА МЕСТА ПЕРЕД КОПИРОВАНИЕМ ==========
+
+def _round_up(size, block):
+    """Размер, округленный вверх до целого числа блоков"""
+    return -(-size // block) * block
+
+def _estimate_directory(task):
+    """Оценка одной папки: (байт с округлением до блоков, элементов, подпапки)"""
+    (path, relative), block, exclude = task
+    # Дыры разреженных файлов при копировании сохраняются и места не занимают
+    sizes_column = "allocated" if sparse_copy_enabled() else "sizes"
+    try:
+        store = scan_directory(path)
+    except OSError:
+        # Нечитаемая папка: ошибку покажет само копирование
+        return 0, 0, []
+    total = 0
+    count = 0
+    subdirs = []
+    for index in range(len(store)):
+        name = store.name(index)
+        rel = os.path.join(relative, name) if relative else name
+        is_dir = store.is_dir(index)
+        if exclude is not None and exclude.excluded(rel, is_dir):
+            continue
+        count += 1
+        if is_dir:
+            subdirs.append((os.path.join(path, name), rel))
+        else:
+            total += _round_up(getattr(store, sizes_column)[index], block)
+    return total, count, subdirs
+
+def estimate_tree(root, block=1, workers=None, exclude=None):
+    """Оценка дерева для копирования: (байт, число inode)
+    
+    Папки читаются в пуле потоков уровень за уровнем; свежие списки
+    берутся из кэша предзагрузки. Каждый файл округляется до блока ФС
+    назначения, каждая папка занимает блок и inode. Исключенное
+    правилами exclude не учитывается.
+    """
+    total = block
+    inodes = 1
+    level = [(root, "")]
+    while level:
+        next_level = []
+        tasks = ((item, block, exclude) for item in level)
+        for size, count, subdirs in parallel_imap(_estimate_directory, tasks, workers):
+            total += size + len(subdirs) * block
+            inodes += count
+            next_level.extend(subdirs)
+        level = next_level
+    return total, inodes
+
+def reflink_supported(source_path, dest_dir, exclude=None):
+    """Пробное клонирование одного файла источника в dest_dir
+    
+    Клонируется первый найденный файл, проба сразу удаляется. Если
+    клонирование удалось, копия файлов reflink не займет блоков данных.
+    """
+    sample = source_path
+    if os.path.isdir(source_path):
+        sample = next((entry.path for entry, _ in iter_tree(source_path, exclude=exclude)
+                       if entry.is_file(follow_symlinks=False)), None)
+        if sample is None:
+            return False
+    probe = os.path.join(dest_dir, f".{os.getpid()}.reflink-probe")
+    if not try_reflink(sample, probe):
+        return False
+    os.remove(probe)
+    return True
+
+def preflight_copy(source_path, dest_path, exclude=None):
+    """Проверка, что копия поместится в папку назначения
+    
+    Сравнивает оценку источника с os.statvfs назначения по свободным
+    блокам и inode. Если файлы будут клонированы (reflink), свободные
+    блоки не проверяются. Возвращает None или текст причины отказа.
+    """
+    if not hasattr(os, "statvfs"):
+        return None
+    dest_dir = os.path.dirname(os.path.abspath(dest_path))
+    same_dev = same_device(source_path, dest_path)
+    if operation_settings["allow_hardlinks"] and same_dev:
+        # Жесткие ссылки не занимают ни блоков, ни inode
+        return None
+    # Клоны делят блоки с источником - нужны только inode
+    cloned = (same_dev and operation_settings["copy_mode"] == "auto"
+              and reflink_supported(source_path, dest_dir, exclude))
+    
+    st = os.statvfs(dest_dir)
+    block = st.f_frsize or 512
+    if os.path.isdir(source_path):
+        needed, inodes = estimate_tree(source_path, block, exclude=exclude)
+    else:
+        source_stat = os.stat(source_path)
+        size = allocated_size(source_stat) if sparse_copy_enabled() else source_stat.st_size
+        needed, inodes = _round_up(size, block), 1
+    
+    free = st.f_bavail * st.f_frsize
+    if needed > free and not cloned:
+        return f"Недостаточно места: нужно {format_size(needed)}, свободно {format_size(free)}"
+    # f_files == 0: ФС без ограничения числа inode (btrfs и др.)
+    if st.f_files and inodes > st.f_favail:
+        return f"Недостаточно inode: нужно {inodes}, свободно {st.f_favail}"
+    return None
+
+# ========== СТАТИСТИКА ПО ТИПАМ ФАЙЛОВ ==========
+
+def _count_file(counters, name, size):
+    """Добавление файла к счетчикам по расширению: расширение -> [файлов, байт]"""
+    extension = os.path.splitext(name)[1].lower()
+    counter = counters.get(extension)
+    if counter is None:
+        counters[extension] = [1, size]
+    else:
+        counter[0] += 1
+        counter[1] += size
+
+def _breakdown_visit(counters, entry, rel):
+    """Учет файла в счетчиках потока: папка верхнего уровня -> расширение -> [файлов, байт]"""
+    try:
+        if not entry.is_file(follow_symlinks=False):
+            return
+        size = entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        return
+    top, separator, _ = rel.partition(os.sep)
+    _count_file(counters.setdefault(top if separator else "", {}), entry.name, size)
+
+def file_type_breakdown(root, workers=None, exclude=None):
+    """Число файлов и байт по расширениям и по папкам верхнего уровня
+    
+    Дерево обходится parallel_walk: у каждого потока свои счетчики,
+    которые сливаются здесь после обхода. Исключенное правилами exclude
+    не учитывается.
+    
+    Возвращает (по расширениям, по папкам): словари имя -> [файлов, байт].
+    Расширение "" - файлы без расширения, папка "" - файлы прямо в root.
+    """
+    if not os.path.isdir(root):
+        raise NotADirectoryError(root)
+    by_extension = {}
+    by_folder = {}
+    for worker_counters in parallel_walk(root, _breakdown_visit, dict, workers, exclude):
+        for top, counters in worker_counters.items():
+            folder = by_folder.setdefault(top, [0, 0])
+            for extension, (count, size) in counters.items():
+                total = by_extension.setdefault(extension, [0, 0])
+                total[0] += count
+                total[1] += size
+                folder[0] += count
+                folder[1] += size
+    return by_extension, by_folder
+
+def print_breakdown(title, counters, empty_name):
+    """Таблица самых больших групп по занятому месту"""
+    total = sum(size for _, size in counters.values()) or 1
+    print(title)
+    ranked = sorted(counters.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (count, size) in ranked[:REPORT_LIMIT]:
+        print(f"  {name or empty_name:30} {count:8} файлов {format_size(size):>10} {100 * size / total:5.1f}%")
+    if len(ranked) > REPORT_LIMIT:
+        print(f"  ... и еще {len(ranked) - REPORT_LIMIT}")
+
+def breakdown_item():
+    """Статистика рабочей директории по типам файлов и папкам"""
+    clear_screen()
+    print_header("СТАТИСТИКА ПО ТИПАМ ФАЙЛОВ")
+    if archive_read_only():
+        return
+    
+    started = time.perf_counter()
+    try:
+        by_extension, by_folder = file_type_breakdown(working_directory, exclude=exclude_rules())
+    except OSError as e:
+        print(f"Ошибка при чтении директории: {e}")
+        wait_for_enter()
+        return
+    files = sum(count for count, _ in by_extension.values())
+    size = sum(size for _, size in by_extension.values())
+    print(f"Всего: {files} файлов, {format_size(size)} ({time.perf_counter() - started:.2f} с)")
+    print("-" * 60)
+    print_breakdown("По расширениям:", by_extension, "(без расширения)")
+    print("-" * 60)
+    print_breakdown("По папкам:", by_folder, "(файлы в корне)")
+    wait_for_enter()
+
+# ========== ОЧИСТКА СТАРЫХ ФАЙЛОВ ==========
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+def iter_cleanup_candidates(root, pattern="*", days=0, time_field="mtime", min_size=0,
+                            exclude=None):
+    """Файлы для очистки: (путь, размер) по мере обхода дерева
+    
+    Подходят обычные файлы, имя которых соответствует шаблону, время
+    изменения (mtime) или доступа (atime) старше days дней и размер не
+    меньше min_size. Список кандидатов в памяти не собирается.
+    """
+    match = re.compile(fnmatch.translate(pattern)).match
+    cutoff = time.time() - days * SECONDS_PER_DAY
+    attribute = "st_atime" if time_field == "atime" else "st_mtime"
+    for entry, _ in iter_tree(root, exclude=exclude):
+        if not match(entry.name):
+            continue
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        if (stat.S_ISREG(st.st_mode) and getattr(st, attribute) < cutoff
+                and st.st_size >= min_size):
+            yield entry.path, st.st_size
+
+def summarize_candidates(candidates):
+    """Пробный прогон: (число файлов, байт) без удаления"""
+    count = total = 0
+    for _, size in candidates:
+        count += 1
+        total += size
+    return count, total
+
+def _remove_candidate(candidate):
+    """Удаление одного файла в пуле: (удален?, размер)"""
+    path, size = candidate
+    rate_limiter("files_per_sec").consume(1)
+    try:
+        os.remove(path)
+        return True, size
+    except OSError:
+        return False, size
+
+def delete_candidates(candidates, workers=None):
+    """Удаление кандидатов в пуле потоков
+    
+    Кандидаты берутся из генератора по мере освобождения потоков, поэтому
+    в работе одновременно не больше нескольких десятков путей.
+    Возвращает словарь: deleted, bytes, failed.
+    """
+    result = {"deleted": 0, "bytes": 0, "failed": 0}
+    for removed, size in parallel_imap(_remove_candidate, candidates, workers):
+        if removed:
+            result["deleted"] += 1
+            result["bytes"] += size
+        else:
+            result["failed"] += 1
+    return result
+
+def cleanup_item():
+    """Удаление старых файлов по шаблону с пробным прогоном"""
+    clear_screen()
+    print_header("ОЧИСТКА СТАРЫХ ФАЙЛОВ")
+    if archive_read_only():
+        return
+    
+    try:
+        pattern = input("Шаблон имени (Enter - все файлы): ").strip() or "*"
+        days = float(input("Старше скольких дней: ").strip())
+        field = input("Учитывать время (Enter - изменения, a - доступа): ").strip().lower()
+        size_text = input("Минимальный размер, например 10M (Enter - любой): ").strip()
+        min_size = parse_size(size_text) if size_text else 0
+    except ValueError:
+        print("❌ Неверное число или размер!")
+        wait_for_enter()
+        return
+    criteria = dict(pattern=pattern, days=days, time_field="atime" if field in ("a", "а") else "mtime",
+                    min_size=min_size, exclude=exclude_rules())
+    
+    started = time.perf_counter()
+    count, total = summarize_candidates(iter_cleanup_candidates(working_directory, **criteria))
+    print(f"Найдено файлов: {count}, объем: {format_size(total)} "
+          f"({time.perf_counter() - started:.2f} с)")
+    if not count:
+        wait_for_enter()
+        return
+    
+    if input("Удалить? (y/n): ").strip().lower() == "y":
+        started = time.perf_counter()
+        with low_io_priority():
+            # Дерево обходится заново: условия проверяются в момент удаления
+            result = delete_candidates(iter_cleanup_candidates(working_directory, **criteria))
+        print(f"✅ Удалено файлов: {result['deleted']}, освобождено: {format_size(result['bytes'])} "
+              f"({time.perf_counter() - started:.2f} с)")
+        if result["failed"]:
+            print(f"❌ Не удалось удалить: {result['failed']}")
+    wait_for_enter()
+
+# ========== ПРАВИЛА ИСКЛЮЧЕНИЯ ==========
+
+# Символы шаблона, после которых нельзя сравнивать имя как строку
+GLOB_CHARS = "*?["
+
+def _glob_to_regex(pattern):
+    """Шаблон .gitignore в регулярное выражение для пути с разделителем /
+    
+    ** соответствует любому числу папок, * и ? - символам внутри имени.
+    """
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            parts.append("[^" + body[1:] + "]" if body[:1] == "!" else "[" + body + "]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+class _RuleBuckets:
+    """Правила одного вида (исключающие или возвращающие), разложенные по корзинам
+    
+    Имена без масок проверяются по словарю, маски вида *.ext - по
+    окончанию имени, остальные маски имени и правила с путем - одним
+    общим регулярным выражением на корзину, которое отсекает промахи
+    до перебора. В каждой корзине хранится номер правила, чтобы
+    последнее совпавшее правило побеждало, как в git.
+    """
+    
+    def __init__(self):
+        self.literals = {}
+        self.suffixes = {}
+        self.globs = []
+        self.paths = []
+        self._any_glob = None
+        self._any_path = None
+        self._suffix_lengths = []
+    
+    def add(self, index, pattern, anchored):
+        body = pattern[1:] if pattern.startswith("*") else None
+        if anchored:
+            self.paths.append((re.compile(_glob_to_regex(pattern) + r"\Z"), index))
+        elif not any(char in pattern for char in GLOB_CHARS):
+            self.literals[pattern] = index
+        elif body and not any(char in body for char in GLOB_CHARS):
+            self.suffixes[body] = index
+        else:
+            self.globs.append((re.compile(_glob_to_regex(pattern) + r"\Z"), index))
+    
+    def compile(self):
+        """Сборка общих выражений после добавления всех правил"""
+        if self.globs:
+            self._any_glob = re.compile("|".join(f"(?:{rx.pattern})" for rx, _ in self.globs))
+        if self.paths:
+            self._any_path = re.compile("|".join(f"(?:{rx.pattern})" for rx, _ in self.paths))
+        self._suffix_lengths = sorted({len(suffix) for suffix in self.suffixes})
+    
+    def last_match(self, name, rel):
+        """Номер последнего совпавшего правила или -1"""
+        best = self.literals.get(name, -1)
+        for length in self._suffix_lengths:
+            if len(name) >= length:
+                best = max(best, self.suffixes.get(name[-length:], -1))
+        if self._any_glob is not None and self._any_glob.match(name):
+            for rx, index in self.globs:
+                if index > best and rx.match(name):
+                    best = index
+        if self._any_path is not None and self._any_path.match(rel):
+            for rx, index in self.paths:
+                if index > best and rx.match(rel):
+                    best = index
+        return best
+
+class ExcludeRules:
+    """Правила исключения в синтаксисе .gitignore, скомпилированные один раз
+    
+    Поддерживаются комментарии #, отрицание !, правило только для папок
+    с / в конце, привязка к корню обхода (/ в начале или внутри
+    шаблона), маски * ? [] и **. Путь rel задается относительно корня
+    обхода; исключенная папка пропускается целиком.
+    """
+    
+    def __init__(self, patterns):
+        # (возвращающие?, только папки?) -> корзины
+        self._buckets = {key: _RuleBuckets() for key in itertools.product((False, True), repeat=2)}
+        self.patterns = []
+        for index, line in enumerate(patterns):
+            pattern = line.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            negated = pattern.startswith("!")
+            pattern = pattern[1:] if negated else pattern
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            if not pattern:
+                continue
+            self._buckets[negated, dir_only].add(index, pattern.lstrip("/"), anchored)
+            self.patterns.append(line.strip())
+        for buckets in self._buckets.values():
+            buckets.compile()
+        self._has_negations = any(line.startswith("!") for line in self.patterns)
+    
+    def __bool__(self):
+        return bool(self.patterns)
+    
+    def _last(self, negated, name, rel, is_dir):
+        index = self._buckets[negated, False].last_match(name, rel)
+        if is_dir:
+            index = max(index, self._buckets[negated, True].last_match(name, rel))
+        return index
+    
+    def excluded(self, rel, is_dir=False):
+        """Исключен ли элемент с относительным путем rel"""
+        rel = rel.replace(os.sep, "/")
+        name = rel.rsplit("/", 1)[-1]
+        excluded = self._last(False, name, rel, is_dir)
+        if excluded < 0 or not self._has_negations:
+            return excluded >= 0
+        return excluded > self._last(True, name, rel, is_dir)
+
+# Скомпилированные правила из настроек: (текст настройки, правила)
+_exclude_cache = ("", None)
+
+def exclude_rules():
+    """Правила исключения из настройки exclude_patterns (None, если пусто)
+    
+    Правила компилируются заново только при изменении настройки.
+    """
+    global _exclude_cache
+    text = operation_settings["exclude_patterns"]
+    if text != _exclude_cache[0]:
+        rules = ExcludeRules(text.split(";"))
+        _exclude_cache = (text, rules or None)
+    return _exclude_cache[1]
+
+# ========== ГЛАВНАЯ ПРОГРАММА ==========
+
+def main():
+    """Главная функция программы"""
+    global working_directory
+    
+    setup_completion()
+    while True:
+        choice = show_menu()
+        
+        if choice == "1":
+            create_folder()
+        elif choice == "2":
+            delete_item()
+        elif choice == "3":
+            copy_item()
+        elif choice == "4":
+            list_contents()
+        elif choice == "5":
+            list_folders()
+        elif choice == "6":
+            list_files()
+        elif choice == "7":
+            system_info()
+        elif choice == "8":
+            show_creator()
+        elif choice == "9":
+            play_quiz()
+        elif choice == "10":
+            bank_account()
+        elif choice == "11":
+            change_directory()
+        elif choice == "12":
+            clear_screen()
+            print("Спасибо за использование программы! До свидания!")
+            sys.exit(0)
+        elif choice == "13":
+            settings_menu()
+        elif choice == "14":
+            move_item()
+        elif choice == "15":
+            bulk_rename()
+        elif choice == "16":
+            permissions_item()
+        elif choice == "17":
+            manifest_item()
+        elif choice == "18":
+            compare_folders()
+        elif choice == "19":
+            compare_files_item()
+        elif choice == "20":
+            folder_size_item()
+        elif choice == "21":
+            search_item()
+        elif choice == "22":
+            breakdown_item()
+        elif choice == "23":
+            cleanup_item()
+        else:
+            print("❌ Неверный пункт меню! Пожалуйста, выберите 1-23.")
+            wait_for_enter()
+
+if __name__ == "__main__":
+    main()
+
+
+# Описание функционала:
+# Основные возможности:
+#
+#     Создание папки - создает новую папку в текущей директории
+#
+#     Удаление - удаляет файл или папку с подтверждением
+#
+#     Копирование - копирует файлы и папки с новым именем
+#
+#     Просмотр содержимого - показывает все файлы и папки с иконками
+#
+#     Только папки - фильтрует и показывает только папки
+#
+#     Только файлы - показывает только файлы с размерами
+#
+#     Информация о системе - выводит детальную информацию об ОС
+#
+#     Создатель программы - информация об авторе
+#
+#     Викторина - игра с 5 вопросами и подсчетом очков
+#
+#     Банковский счет - управление счетом с сохранением в файл
+#
+#     Смена директории - поддержка абсолютных и относительных путей
+#
+#     Выход - корректное завершение программы
+#
+# Дополнительные улучшения:
+#
+#     ✅ Сохранение данных банковского счета в файл
+#
+#     ✅ Эмодзи для наглядного отображения 📁 📄
+#
+#     ✅ Информация о размере файлов
+#
+#     ✅ Обработка ошибок и исключений
+#
+#     ✅ Красивое форматирование вывода
+#
+#     ✅ Поддержка кириллицы
+#
+#     ✅ Работает на Windows и Linux/Mac
+#
+#     ✅ Вход в .zip/.tar как в папку без распаковки (кэшируемый индекс архива)
+#
+#     ✅ Мгновенное копирование reflink/жесткими ссылками на той же ФС, меню настроек
+#
+#     ✅ Копирование разреженных файлов без заполнения дыр (SEEK_DATA/SEEK_HOLE)
+#
+#     ✅ Адаптивный буфер копирования, posix_fadvise и O_DIRECT для больших файлов
+#
+#     ✅ Лимиты байт/с и файлов/с (token bucket) и низкий приоритет ввода-вывода для копирования и удаления
+#
+#     ✅ Перемещение/переименование: os.rename на одном устройстве, потоковый перенос с удалением по файлам между устройствами
+#
+#     ✅ Массовое переименование по glob/regex с предпросмотром, проверкой коллизий и разрывом циклов
+#
+#     ✅ Массовое создание папок по шаблону {2026..2027}/{01..12} с mkdir относительно dir_fd
+#
+#     ✅ Параллельная рекурсивная смена прав и владельца с пропуском уже совпадающих элементов
+#
+#     ✅ Параллельный манифест sha256 и проверка по нему с кэшем сумм по (inode, размер, mtime)
+#
+#     ✅ Проверка копий: сумма источника считается во время копирования, копия перечитывается с диска
+#
+#     ✅ Потоковое сравнение двух папок: размер и время, суммы в пуле потоков только при необходимости
+#
+#     ✅ Быстрое сравнение двух файлов: сначала размер, затем блоки readinto с выходом на первом различии
+#
+#     ✅ Просмотр начала/конца файла через mmap и слежение за логом (inotify или опрос) из списка файлов
+#
+#     ✅ Hex/ASCII просмотр через mmap: переход по смещению и поиск байт участками
+#
+#     ✅ Разбиение файла по размеру/строкам (параллельно pread/pwrite) и склейка через copy_file_range
+#
+#     ✅ История папок с оценкой frecency: переход по части имени, как в zoxide
+#
+#     ✅ Дополнение путей по Tab с кэшем содержимого папок
+#
+#     ✅ Фоновая предзагрузка списков соседних папок в LRU-кэш
+#
+#     ✅ Компактное хранилище списков папок, размер папки и поиск файлов
+#
+#     ✅ Монитор ресурсов: CPU, память, нагрузка, диски и свободное место
+#
+#     ✅ Проверка свободного места и inode перед копированием
+#
+#     ✅ Статистика занятого места по расширениям и папкам верхнего уровня
+#
+#     ✅ Очистка старых файлов по шаблону, возрасту и размеру
+#
+#     ✅ Правила исключения в синтаксисе .gitignore для копирования, удаления, размера и поиска
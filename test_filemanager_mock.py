@@ -2,6 +2,7 @@
 Модуль с тестами для "грязных" функций файлового менеджера
 с использованием unittest.mock для имитации ввода/вывода
 """
+import _thread
 import unittest
 from unittest.mock import patch, MagicMock, mock_open
 import os
@@ -32,9 +33,15 @@ class TestFileManagerMocked(unittest.TestCase):
         # Сохраняем оригинальную рабочую директорию модуля
         self.original_working_dir = fm.working_directory
         fm.working_directory = self.test_dir
+        
+        # История папок ведется во временном файле, а не в домашней папке
+        self.db_patch = patch.multiple(fm, DIRECTORY_DB_FILE=os.path.join(self.test_dir, '.dirs'),
+                                       _directory_db=None)
+        self.db_patch.start()
     
     def tearDown(self):
         """Очистка после тестов"""
+        self.db_patch.stop()
         os.chdir(self.original_dir)
         shutil.rmtree(self.test_dir)
         fm.working_directory = self.original_working_dir
@@ -297,5 +304,1515 @@ class TestBankAccountMocked(unittest.TestCase):
         mock_print.assert_any_call("2. Еда - 200.0 руб.")
 
 
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestArchiveBrowsing(unittest.TestCase):
+    """Тесты просмотра архивов без распаковки"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.original_working_dir = fm.working_directory
+        fm.working_directory = self.test_dir
+        
+        self.zip_path = os.path.join(self.test_dir, 'data.zip')
+        import zipfile
+        with zipfile.ZipFile(self.zip_path, 'w') as zf:
+            zf.writestr('readme.txt', 'hello', compress_type=zipfile.ZIP_STORED)
+            zf.writestr('docs/big.txt', 'x' * 100000, compress_type=zipfile.ZIP_DEFLATED)
+        
+        self.tar_path = os.path.join(self.test_dir, 'data.tar')
+        source = os.path.join(self.test_dir, 'notes.txt')
+        with open(source, 'w') as f:
+            f.write('tar content')
+        import tarfile
+        with tarfile.open(self.tar_path, 'w') as tf:
+            tf.add(source, arcname='inner/notes.txt')
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+        fm.working_directory = self.original_working_dir
+    
+    def test_split_archive_path(self):
+        """Путь внутри архива разбивается на архив и внутренний путь"""
+        inside = os.path.join(self.zip_path, 'docs')
+        self.assertEqual(fm.split_archive_path(inside), (self.zip_path, 'docs'))
+        self.assertIsNone(fm.split_archive_path(self.test_dir))
+    
+    def test_read_directory_inside_zip(self):
+        """Листинг архива, включая неявные папки"""
+        items = sorted(fm.read_directory(self.zip_path))
+        self.assertEqual(items, [('docs', True, False, 0), ('readme.txt', False, True, 5)])
+    
+    def test_extract_single_member(self):
+        """Копирование одного члена архива прямым seek"""
+        index = fm.get_archive_index(self.zip_path)
+        dest = os.path.join(self.test_dir, 'big_copy.txt')
+        self.assertEqual(index.extract('docs/big.txt', dest), 1)
+        with open(dest) as f:
+            self.assertEqual(f.read(), 'x' * 100000)
+        
+        tar_index = fm.get_archive_index(self.tar_path)
+        dest = os.path.join(self.test_dir, 'notes_copy.txt')
+        tar_index.extract('inner/notes.txt', dest)
+        with open(dest) as f:
+            self.assertEqual(f.read(), 'tar content')
+    
+    def test_compressed_folder_read_once(self):
+        """Папка из сжатого tar копируется за один проход по архиву"""
+        import tarfile
+        gz_path = os.path.join(self.test_dir, 'data.tar.gz')
+        with tarfile.open(gz_path, 'w:gz') as tf:
+            for i in range(5):
+                path = os.path.join(self.test_dir, 'f%d.txt' % i)
+                with open(path, 'w') as f:
+                    f.write('file %d' % i)
+                tf.add(path, arcname='dir/f%d.txt' % i)
+            tf.add(os.path.join(self.test_dir, 'notes.txt'), arcname='other.txt')
+        index = fm.get_archive_index(gz_path)
+        dest = os.path.join(self.test_dir, 'dir_copy')
+        with patch.object(fm.tarfile, 'open', side_effect=tarfile.open) as mock_open:
+            self.assertEqual(index.extract('dir', dest), 5)
+        self.assertEqual(mock_open.call_count, 1)
+        for i in range(5):
+            with open(os.path.join(dest, 'f%d.txt' % i)) as f:
+                self.assertEqual(f.read(), 'file %d' % i)
+    
+    @patch('builtins.print')
+    def test_copy_from_corrupt_archive(self, mock_print):
+        """Испорченный архив - сообщение об ошибке, а не падение"""
+        with open(self.zip_path, 'wb') as f:
+            f.write(b'not a zip at all')
+        fm._archive_index_cache.clear()
+        fm.working_directory = self.zip_path
+        with patch('builtins.input', side_effect=['readme.txt', '']):
+            fm.copy_item()
+        output = "\n".join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn("не удалось прочитать архив", output)
+    
+    def test_index_is_cached(self):
+        """Индекс архива строится один раз"""
+        self.assertIs(fm.get_archive_index(self.zip_path), fm.get_archive_index(self.zip_path))
+    
+    @patch('builtins.input', return_value='data.zip/docs')
+    @patch('builtins.print')
+    def test_change_directory_into_archive(self, mock_print, mock_input):
+        """Смена директории на папку внутри архива"""
+        fm.change_directory()
+        self.assertEqual(fm.working_directory, os.path.join(self.zip_path, 'docs'))
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestCopyModes(unittest.TestCase):
+    """Тесты режимов копирования reflink/hardlink/copy"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.original_settings = dict(fm.operation_settings)
+        self.source = os.path.join(self.test_dir, 'source.txt')
+        with open(self.source, 'w') as f:
+            f.write('content')
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+        fm.operation_settings.update(self.original_settings)
+    
+    def test_copy_mode_plain(self):
+        """В режиме copy всегда обычное копирование"""
+        fm.operation_settings['copy_mode'] = 'copy'
+        dest = os.path.join(self.test_dir, 'dest.txt')
+        self.assertEqual(fm.copy_path(self.source, dest), [('source.txt', 'copy', None)])
+        with open(dest) as f:
+            self.assertEqual(f.read(), 'content')
+    
+    def test_hardlink_fallback(self):
+        """Если reflink недоступен, используется жесткая ссылка (по согласию)"""
+        fm.operation_settings['allow_hardlinks'] = True
+        dest = os.path.join(self.test_dir, 'dest.txt')
+        with patch.object(fm, 'try_reflink', return_value=False):
+            report = fm.copy_path(self.source, dest)
+        self.assertEqual(report, [('source.txt', 'hardlink', None)])
+        self.assertTrue(os.path.samefile(self.source, dest))
+    
+    def test_reflink_reported_for_tree(self):
+        """Способ копирования сообщается для каждого файла папки"""
+        folder = os.path.join(self.test_dir, 'folder')
+        os.makedirs(os.path.join(folder, 'sub'))
+        shutil.copy(self.source, os.path.join(folder, 'sub', 'a.txt'))
+        dest = os.path.join(self.test_dir, 'folder_copy')
+        with patch.object(fm.fcntl, 'ioctl') as mock_ioctl:
+            report = fm.copy_path(folder, dest)
+        self.assertEqual(report, [(os.path.join('sub', 'a.txt'), 'reflink', None)])
+        mock_ioctl.assert_called_once()
+    
+    def test_sparse_file_keeps_holes(self):
+        """Разреженный файл копируется без заполнения дыр"""
+        sparse = os.path.join(self.test_dir, 'image.img')
+        with open(sparse, 'wb') as f:
+            f.truncate(16 * 1024 * 1024)
+            f.seek(8 * 1024 * 1024)
+            f.write(b'data')
+        if not fm.is_sparse_file(sparse):
+            self.skipTest("ФС не поддерживает разреженные файлы")
+        
+        dest = os.path.join(self.test_dir, 'image_copy.img')
+        fm.operation_settings['copy_mode'] = 'copy'
+        self.assertEqual(fm.copy_path(sparse, dest), [('image.img', 'sparse', None)])
+        with open(sparse, 'rb') as a, open(dest, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertTrue(fm.is_sparse_file(dest))
+        
+        # Проверка копии: источник хэшируется при копировании, а не читается повторно
+        verified = os.path.join(self.test_dir, 'image_verified.img')
+        fm.operation_settings['verify_copy'] = 'on'
+        with patch.object(fm, 'hash_file', wraps=fm.hash_file) as mock_hash:
+            self.assertEqual(fm.copy_path(sparse, verified), [('image.img', 'sparse', 'ok')])
+        mock_hash.assert_called_once_with(verified, direct=False)
+        with open(sparse, 'rb') as f:
+            expected = fm.hashlib.sha256(f.read()).hexdigest()
+        self.assertEqual(fm.copy_sparse_file(sparse, dest + '2', compute_hash=True), expected)
+    
+    def test_choose_buffer_size(self):
+        """Буфер кратен блоку ФС и ограничен сверху и снизу"""
+        self.assertEqual(fm.choose_buffer_size(100, 4096), fm.MIN_COPY_BUFFER)
+        self.assertEqual(fm.choose_buffer_size(10 ** 12, 4096), fm.MAX_COPY_BUFFER)
+        self.assertEqual(fm.choose_buffer_size(10 ** 8, 1024 * 1024) % (1024 * 1024), 0)
+    
+    def test_buffered_copy_cache_friendly_and_direct(self):
+        """Копирование с вытеснением из кэша и с O_DIRECT дает точную копию"""
+        data = os.urandom(300000)
+        with open(self.source, 'wb') as f:
+            f.write(data)
+        fm.operation_settings['direct_io'] = True
+        with patch.object(fm, 'CACHE_FRIENDLY_THRESHOLD', 1), \
+                patch.object(fm, 'CACHE_DROP_INTERVAL', 65536), \
+                patch.object(fm, 'DIRECT_IO_THRESHOLD', 1):
+            for name in ('direct.bin', 'cached.bin'):
+                dest = os.path.join(self.test_dir, name)
+                fm.copy_file_buffered(self.source, dest)
+                with open(dest, 'rb') as f:
+                    self.assertEqual(f.read(), data)
+                fm.operation_settings['direct_io'] = False
+    
+    def test_buffered_copy_closes_source_on_error(self):
+        """Если назначение не открылось, источник закрывается"""
+        dest = os.path.join(self.test_dir, 'dest.txt')
+        real_open = os.open
+        opened = []
+        
+        def failing_open(path, flags, *args):
+            if path == dest:
+                raise PermissionError(13, "Permission denied", path)
+            fd = real_open(path, flags, *args)
+            opened.append(fd)
+            return fd
+        
+        with patch.object(fm.os, 'open', side_effect=failing_open):
+            self.assertRaises(PermissionError, fm.copy_file_buffered, self.source, dest)
+        self.assertEqual(len(opened), 1)
+        self.assertRaises(OSError, os.fstat, opened[0])
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestThrottling(unittest.TestCase):
+    """Тесты ограничения скорости и приоритета ввода-вывода"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.original_settings = dict(fm.operation_settings)
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+        fm.operation_settings.update(self.original_settings)
+    
+    def test_token_bucket_waits_when_empty(self):
+        """При исчерпании токенов ведро заставляет ждать"""
+        bucket = fm.TokenBucket(100)
+        with patch.object(fm.time, 'sleep') as mock_sleep:
+            bucket.consume(100)
+            mock_sleep.assert_not_called()
+            bucket.consume(50)
+            self.assertAlmostEqual(mock_sleep.call_args[0][0], 0.5, places=1)
+    
+    def test_unlimited_bucket(self):
+        """Нулевой лимит - без ожидания"""
+        with patch.object(fm.time, 'sleep') as mock_sleep:
+            fm.TokenBucket(0).consume(10 ** 9)
+            mock_sleep.assert_not_called()
+    
+    def test_delete_path_counts_files(self):
+        """Удаление папки с подсчетом файлов через ограничитель"""
+        folder = os.path.join(self.test_dir, 'folder')
+        os.makedirs(os.path.join(folder, 'sub'))
+        for name in ('a.txt', os.path.join('sub', 'b.txt')):
+            with open(os.path.join(folder, name), 'w') as f:
+                f.write('x')
+        fm.operation_settings['files_per_sec'] = 1000
+        self.assertEqual(fm.delete_path(folder), (2, 0))
+        self.assertFalse(os.path.exists(folder))
+    
+    def test_low_io_priority_disabled(self):
+        """Без настройки приоритет не меняется"""
+        fm.operation_settings['low_io_priority'] = False
+        with patch.object(fm, '_ioprio_syscall') as mock_syscall:
+            with fm.low_io_priority():
+                pass
+            mock_syscall.assert_not_called()
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestMove(unittest.TestCase):
+    """Тесты перемещения файлов и папок"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.folder = os.path.join(self.test_dir, 'folder')
+        os.makedirs(os.path.join(self.folder, 'sub'))
+        with open(os.path.join(self.folder, 'sub', 'a.txt'), 'w') as f:
+            f.write('content')
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+    
+    def test_move_same_device_renames(self):
+        """На одном устройстве используется os.rename"""
+        dest = os.path.join(self.test_dir, 'moved')
+        self.assertEqual(fm.move_path(self.folder, dest), 'rename')
+        self.assertFalse(os.path.exists(self.folder))
+        self.assertTrue(os.path.exists(os.path.join(dest, 'sub', 'a.txt')))
+    
+    def test_move_across_devices_streams(self):
+        """Между устройствами файлы копируются и источник удаляется"""
+        dest = os.path.join(self.test_dir, 'moved')
+        with patch.object(fm, 'same_device', return_value=False):
+            self.assertEqual(fm.move_path(self.folder, dest), 'stream')
+        self.assertFalse(os.path.exists(self.folder))
+        with open(os.path.join(dest, 'sub', 'a.txt')) as f:
+            self.assertEqual(f.read(), 'content')
+    
+    def test_source_kept_if_copy_fails(self):
+        """Если копия не удалась, исходный файл остается"""
+        source = os.path.join(self.folder, 'sub', 'a.txt')
+        with patch.object(fm, 'same_device', return_value=False), \
+                patch.object(fm, 'copy_file', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                fm.move_path(source, os.path.join(self.test_dir, 'b.txt'))
+        self.assertTrue(os.path.exists(source))
+    
+    @unittest.skipIf(not hasattr(os, 'symlink') or os.name == 'nt', "Нужны символические ссылки")
+    def test_move_across_devices_keeps_symlinks(self):
+        """Ссылки на папки и файлы переносятся как ссылки"""
+        os.symlink('sub', os.path.join(self.folder, 'link'))
+        os.symlink(os.path.join('sub', 'a.txt'), os.path.join(self.folder, 'flink'))
+        dest = os.path.join(self.test_dir, 'moved')
+        with patch.object(fm, 'same_device', return_value=False):
+            fm.move_path(self.folder, dest)
+        self.assertFalse(os.path.exists(self.folder))
+        self.assertEqual(os.readlink(os.path.join(dest, 'link')), 'sub')
+        self.assertEqual(os.readlink(os.path.join(dest, 'flink')), os.path.join('sub', 'a.txt'))
+        self.assertTrue(os.path.isfile(os.path.join(dest, 'sub', 'a.txt')))
+        
+        top = os.path.join(self.test_dir, 'top')
+        os.symlink('moved', top)
+        with patch.object(fm, 'same_device', return_value=False):
+            fm.move_path(top, os.path.join(self.test_dir, 'top2'))
+        self.assertFalse(os.path.lexists(top))
+        self.assertEqual(os.readlink(os.path.join(self.test_dir, 'top2')), 'moved')
+    
+    @unittest.skipIf(not hasattr(os, 'symlink') or os.name == 'nt', "Нужны символические ссылки")
+    def test_move_dangling_symlink(self):
+        """Битая ссылка перемещается как ссылка, устройство берется у нее самой"""
+        link = os.path.join(self.test_dir, 'dangling')
+        os.symlink('missing-target', link)
+        dest = os.path.join(self.test_dir, 'moved-link')
+        self.assertEqual(fm.move_path(link, dest), 'rename')
+        self.assertEqual(os.readlink(dest), 'missing-target')
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestBulkRename(unittest.TestCase):
+    """Тесты массового переименования"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        for name in ('a.txt', 'b.txt', 'c.log'):
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write(name)
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+    
+    def read(self, name):
+        """Чтение тестового файла"""
+        with open(os.path.join(self.test_dir, name)) as f:
+            return f.read()
+    
+    def test_plan_with_counter(self):
+        """Шаблон со счетчиком и расширением"""
+        plan, problems = fm.plan_bulk_rename(self.test_dir, '*.txt', 'file_{n:02d}{ext}')
+        self.assertEqual(plan, [('a.txt', 'file_01.txt'), ('b.txt', 'file_02.txt')])
+        self.assertEqual(problems, [])
+    
+    def test_directories_not_renamed(self):
+        """Папки не попадают в план, но занимают имена при проверке коллизий"""
+        os.makedirs(os.path.join(self.test_dir, 'sub'))
+        os.makedirs(os.path.join(self.test_dir, '2.txt'))
+        plan, problems = fm.plan_bulk_rename(self.test_dir, '*', '{n}{ext}')
+        self.assertEqual([old for old, _ in plan if old in ('sub', '2.txt')], [])
+        self.assertEqual(plan[0], ('a.txt', '1.txt'))
+        self.assertTrue(any("2.txt" in problem for problem in problems))
+    
+    def test_plan_with_regex_groups(self):
+        """Группы регулярного выражения в шаблоне"""
+        plan, problems = fm.plan_bulk_rename(self.test_dir, r're:(\w)\.(log)', '{2}_{1}.txt')
+        self.assertEqual(plan, [('c.log', 'log_c.txt')])
+    
+    def test_template_errors_reported(self):
+        """Ошибки шаблона и конфликт имен групп - проблемы плана, а не исключения"""
+        plan, problems = fm.plan_bulk_rename(self.test_dir, r're:(?P<name>\w+)\.txt', '{name}.md')
+        self.assertEqual(plan, [])
+        self.assertIn("name", problems[0])
+        plan, problems = fm.plan_bulk_rename(self.test_dir, r're:(?P<base>\w+)\.txt', '{base}_{n}.md')
+        self.assertEqual(plan, [('a.txt', 'a_1.md'), ('b.txt', 'b_2.md')])
+        for template in ('{name.x}', '{5}', '{missing}', '{n:%Y}'):
+            plan, problems = fm.plan_bulk_rename(self.test_dir, '*.txt', template)
+            self.assertEqual(len(problems), 1, template)
+    
+    def test_collision_detected(self):
+        """Совпадение новых имен и занятые имена обнаруживаются заранее"""
+        plan, problems = fm.plan_bulk_rename(self.test_dir, '*.txt', 'same.txt')
+        self.assertEqual(len(problems), 1)
+        plan, problems = fm.plan_bulk_rename(self.test_dir, 'a.txt', 'c.log')
+        self.assertEqual(len(problems), 1)
+    
+    def test_swap_uses_one_temporary_name(self):
+        """Цикл a <-> b разрывается одним временным именем"""
+        plan = [('a.txt', 'b.txt'), ('b.txt', 'a.txt')]
+        steps = fm.order_renames(plan, os.listdir(self.test_dir))
+        self.assertEqual(len(steps), 3)
+        fm.apply_bulk_rename(self.test_dir, steps)
+        self.assertEqual(self.read('a.txt'), 'b.txt')
+        self.assertEqual(self.read('b.txt'), 'a.txt')
+    
+    def test_chain_without_temporary_names(self):
+        """Цепочка переименований выполняется с конца без временных имен"""
+        plan = [('a.txt', 'b.txt'), ('b.txt', 'd.txt')]
+        steps = fm.order_renames(plan, os.listdir(self.test_dir))
+        self.assertEqual(steps, [('b.txt', 'd.txt'), ('a.txt', 'b.txt')])
+    
+    def test_failed_batch_rolled_back(self):
+        """Сбой посередине отменяет выполненные шаги, включая временные имена"""
+        plan = [('a.txt', 'b.txt'), ('b.txt', 'a.txt'), ('c.log', 'd.log')]
+        steps = fm.order_renames(plan, os.listdir(self.test_dir))
+        before = sorted(os.listdir(self.test_dir))
+        real_rename = os.rename
+        calls = []
+        
+        def failing_rename(src, dst):
+            calls.append(src)
+            if len(calls) == len(steps):
+                raise OSError("диск отключен")
+            real_rename(src, dst)
+        
+        with patch.object(fm.os, 'rename', side_effect=failing_rename):
+            self.assertRaises(OSError, fm.apply_bulk_rename, self.test_dir, steps)
+        self.assertEqual(sorted(os.listdir(self.test_dir)), before)
+        self.assertEqual(self.read('a.txt'), 'a.txt')
+        self.assertEqual(self.read('b.txt'), 'b.txt')
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestBulkFolders(unittest.TestCase):
+    """Тесты массового создания папок"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.original_working_dir = fm.working_directory
+        fm.working_directory = self.test_dir
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+        fm.working_directory = self.original_working_dir
+    
+    def test_expand_braces(self):
+        """Раскрытие списков и диапазонов с дополнением нулями"""
+        self.assertEqual(fm.expand_braces('d/{2026..2027}/{a,b}'),
+                         ['d/2026/a', 'd/2026/b', 'd/2027/a', 'd/2027/b'])
+        self.assertEqual(fm.expand_braces('s_{08..10}'), ['s_08', 's_09', 's_10'])
+        self.assertEqual(fm.expand_braces('plain{x}'), ['plain{x}'])
+    
+    def test_create_folders_bulk_counts(self):
+        """Общие родители создаются один раз, существующие папки считаются"""
+        os.makedirs(os.path.join(self.test_dir, 'data', '2026'))
+        stats = fm.create_folders_bulk(self.test_dir, fm.expand_braces('data/{2026,2027}/{01..03}'))
+        self.assertEqual(stats['created'], 7)
+        self.assertEqual(stats['existing'], 2)
+        self.assertEqual(stats['failed'], 0)
+        self.assertTrue(os.path.isdir(os.path.join(self.test_dir, 'data', '2027', '03')))
+    
+    def test_create_folders_bulk_failed_subtree(self):
+        """Если на месте папки файл, ее поддерево считается ошибкой"""
+        with open(os.path.join(self.test_dir, 'busy'), 'w') as f:
+            f.write('x')
+        stats = fm.create_folders_bulk(self.test_dir, ['busy/a', 'busy/b', 'ok'])
+        self.assertEqual(stats['failed'], 3)
+        self.assertEqual(stats['created'], 1)
+    
+    @patch('builtins.input', return_value='x/{1..3}')
+    @patch('builtins.print')
+    def test_create_folder_bulk_mode(self, mock_print, mock_input):
+        """Пункт меню создает папки по шаблону"""
+        fm.create_folder()
+        self.assertEqual(sorted(os.listdir(os.path.join(self.test_dir, 'x'))), ['1', '2', '3'])
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestPermissions(unittest.TestCase):
+    """Тесты рекурсивной смены прав и владельца"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.folder = os.path.join(self.test_dir, 'folder')
+        os.makedirs(os.path.join(self.folder, 'sub'))
+        for name in ('a.txt', os.path.join('sub', 'b.txt')):
+            with open(os.path.join(self.folder, name), 'w') as f:
+                f.write('x')
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+    
+    def test_iter_tree_relative_paths(self):
+        """Обход дерева выдает относительные пути"""
+        paths = sorted(rel for entry, rel in fm.iter_tree(self.folder))
+        self.assertEqual(paths, ['a.txt', 'sub', os.path.join('sub', 'b.txt')])
+    
+    def test_chmod_skips_matching_entries(self):
+        """Совпадающие права не меняются повторно"""
+        os.chmod(os.path.join(self.folder, 'a.txt'), 0o640)
+        stats = fm.change_permissions_tree(self.folder, mode=0o640)
+        self.assertEqual(stats, {'changed': 3, 'unchanged': 1, 'failed': 0})
+        self.assertEqual(os.stat(os.path.join(self.folder, 'sub')).st_mode & 0o777, 0o640)
+        os.chmod(self.folder, 0o755)
+        os.chmod(os.path.join(self.folder, 'sub'), 0o755)
+    
+    def test_chmod_without_x_on_directories(self):
+        """Папка меняется только после своего содержимого, поэтому 0o600 не мешает обходу"""
+        real_chmod = os.chmod
+        order = []
+        
+        def recording_chmod(path, mode):
+            order.append(path)
+            real_chmod(path, mode)
+        
+        try:
+            with patch.object(fm.os, 'chmod', side_effect=recording_chmod):
+                stats = fm.change_permissions_tree(self.folder, mode=0o600)
+            self.assertEqual(stats, {'changed': 4, 'unchanged': 0, 'failed': 0})
+            sub = os.path.join(self.folder, 'sub')
+            self.assertEqual(order[-2:], [sub, self.folder])
+            self.assertLess(order.index(os.path.join(sub, 'b.txt')), order.index(sub))
+        finally:
+            real_chmod(self.folder, 0o755)
+            real_chmod(os.path.join(self.folder, 'sub'), 0o755)
+    
+    def test_chown_to_current_owner_is_noop(self):
+        """Смена владельца на текущего ничего не вызывает"""
+        with patch.object(fm.os, 'chown') as mock_chown:
+            stats = fm.change_permissions_tree(self.folder, uid=os.getuid(), gid=os.getgid())
+        mock_chown.assert_not_called()
+        self.assertEqual(stats['unchanged'], 4)
+    
+    def test_parse_mode_and_owner(self):
+        """Разбор прав и владельца"""
+        self.assertEqual(fm.parse_mode('755'), 0o755)
+        self.assertRaises(ValueError, fm.parse_mode, '99999')
+        self.assertEqual(fm.parse_owner('1000:'), (1000, -1))
+        self.assertEqual(fm.parse_owner(':50'), (-1, 50))
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestManifest(unittest.TestCase):
+    """Тесты манифеста контрольных сумм"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'delivery')
+        os.makedirs(os.path.join(self.root, 'sub'))
+        for name, content in (('a.txt', 'alpha'), (os.path.join('sub', 'b.txt'), 'beta')):
+            with open(os.path.join(self.root, name), 'w') as f:
+                f.write(content)
+        self.manifest = os.path.join(self.test_dir, 'delivery.sha256')
+        self.cache_patch = patch.multiple(fm, HASH_CACHE_FILE=os.path.join(self.test_dir, 'hashes'),
+                                          _hash_cache=None, _hash_cache_dirty=False)
+        self.cache_patch.start()
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.cache_patch.stop()
+        shutil.rmtree(self.test_dir)
+    
+    def test_build_manifest_sorted(self):
+        """Манифест отсортирован и в формате sha256sum"""
+        count, errors = fm.build_manifest(self.root, self.manifest)
+        self.assertEqual((count, errors), (2, []))
+        with open(self.manifest) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines[0].endswith('  a.txt'))
+        self.assertTrue(lines[1].endswith('  sub/b.txt'))
+        self.assertEqual(lines[0].split()[0], fm.hash_file(os.path.join(self.root, 'a.txt')))
+    
+    def test_verify_reports_mismatch_and_missing(self):
+        """Проверка находит измененные и отсутствующие файлы"""
+        fm.build_manifest(self.root, self.manifest)
+        with open(os.path.join(self.root, 'a.txt'), 'w') as f:
+            f.write('changed!')
+        os.remove(os.path.join(self.root, 'sub', 'b.txt'))
+        result = fm.verify_manifest(self.root, self.manifest)
+        self.assertEqual(result, {'ok': 0, 'mismatched': ['a.txt'], 'missing': ['sub/b.txt']})
+    
+    def test_unchanged_files_not_rehashed(self):
+        """Повторная проверка неизменных файлов берет суммы из кэша"""
+        fm.build_manifest(self.root, self.manifest)
+        self.assertTrue(os.path.exists(fm.HASH_CACHE_FILE))
+        fm._hash_cache = None
+        with patch.object(fm, 'hash_file') as mock_hash:
+            result = fm.verify_manifest(self.root, self.manifest)
+        mock_hash.assert_not_called()
+        self.assertEqual(result['ok'], 2)
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestVerifyCopy(unittest.TestCase):
+    """Тесты проверки копий"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.original_settings = dict(fm.operation_settings)
+        fm.operation_settings['copy_mode'] = 'copy'
+        self.source = os.path.join(self.test_dir, 'source.bin')
+        self.data = os.urandom(1000000)
+        with open(self.source, 'wb') as f:
+            f.write(self.data)
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+        fm.operation_settings.update(self.original_settings)
+    
+    def test_hash_computed_during_copy(self):
+        """Сумма источника считается в том же проходе, что и копирование"""
+        dest = os.path.join(self.test_dir, 'dest.bin')
+        with patch.object(fm, 'MIN_COPY_BUFFER', 4096), patch.object(fm, 'MAX_COPY_BUFFER', 65536):
+            digest = fm.copy_file_buffered(self.source, dest, compute_hash=True)
+        self.assertEqual(digest, fm.hash_file(self.source))
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+    
+    def test_verified_copy_report(self):
+        """В отчете для каждого файла есть результат проверки"""
+        fm.operation_settings['verify_copy'] = 'on'
+        dest = os.path.join(self.test_dir, 'dest.bin')
+        self.assertEqual(fm.copy_path(self.source, dest), [('source.bin', 'copy', 'ok')])
+    
+    def test_corrupted_copy_detected(self):
+        """Испорченная копия определяется по сумме, прочитанной с диска"""
+        fm.operation_settings['verify_copy'] = 'direct'
+        dest = os.path.join(self.test_dir, 'dest.bin')
+        digest = fm.copy_file_buffered(self.source, dest, compute_hash=True)
+        with open(dest, 'r+b') as f:
+            f.seek(500000)
+            f.write(b'!')
+        self.assertEqual(fm.verify_copy(self.source, dest, digest, direct=True), 'mismatch')
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestCompareTrees(unittest.TestCase):
+    """Тесты сравнения папок"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.left = os.path.join(self.test_dir, 'left')
+        self.right = os.path.join(self.test_dir, 'right')
+        self.files = {
+            'same.txt': ('abc', 'abc'),
+            'size.txt': ('abc', 'abcd'),
+            'content.txt': ('abc', 'xyz'),
+            'touched.txt': ('abc', 'abc'),
+            os.path.join('sub', 'left_only.txt'): ('1', None),
+            os.path.join('sub', 'right_only.txt'): (None, '2'),
+        }
+        for rel, contents in self.files.items():
+            for root, content in zip((self.left, self.right), contents):
+                if content is not None:
+                    path = os.path.join(root, rel)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'w') as f:
+                        f.write(content)
+        for rel in ('same.txt', 'size.txt'):
+            os.utime(os.path.join(self.right, rel), (1000, 1000))
+            os.utime(os.path.join(self.left, rel), (1000, 1000))
+        for rel in ('content.txt', 'touched.txt'):
+            os.utime(os.path.join(self.left, rel), (1000, 1000))
+            os.utime(os.path.join(self.right, rel), (5000, 5000))
+        self.cache_patch = patch.multiple(fm, HASH_CACHE_FILE=os.path.join(self.test_dir, 'hashes'),
+                                          _hash_cache=None, _hash_cache_dirty=False)
+        self.cache_patch.start()
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.cache_patch.stop()
+        shutil.rmtree(self.test_dir)
+    
+    def test_classification(self):
+        """Каждый элемент получает свой статус"""
+        result = dict((rel, status) for status, rel in fm.compare_trees(self.left, self.right))
+        self.assertEqual(result, {
+            'same.txt': 'same',
+            'size.txt': 'different',
+            'content.txt': 'different',
+            'touched.txt': 'same',
+            os.path.join('sub', 'left_only.txt'): 'only_left',
+            os.path.join('sub', 'right_only.txt'): 'only_right',
+        })
+    
+    def test_contents_hashed_only_when_needed(self):
+        """Содержимое хэшируется только при совпадении размера и разнице во времени"""
+        with patch.object(fm, 'cached_hash', side_effect=fm.cached_hash) as mock_hash:
+            list(fm.compare_trees(self.left, self.right))
+        hashed = sorted(os.path.basename(call[0][0]) for call in mock_hash.call_args_list)
+        self.assertEqual(hashed, ['content.txt', 'content.txt', 'touched.txt', 'touched.txt'])
+    
+    def test_shallow_mode(self):
+        """Без deep разное время считается различием"""
+        result = dict((rel, status) for status, rel in fm.compare_trees(self.left, self.right, deep=False))
+        self.assertEqual(result['touched.txt'], 'different')
+    
+    def test_unreadable_directory_is_error(self):
+        """Папка, которую не удалось прочитать, не считается совпадающей"""
+        real_scandir = os.scandir
+        
+        def failing_scandir(path):
+            if os.path.basename(path) == 'sub':
+                raise PermissionError(13, "Permission denied", path)
+            return real_scandir(path)
+        
+        with patch.object(fm.os, 'scandir', side_effect=failing_scandir):
+            result = dict((rel, status) for status, rel in fm.compare_trees(self.left, self.right))
+        self.assertEqual(result['sub'], 'error')
+        self.assertNotIn(os.path.join('sub', 'left_only.txt'), result)
+    
+    @patch('builtins.print')
+    def test_report_in_missing_folder(self, mock_print):
+        """Отчет в несуществующей папке - сообщение об ошибке, а не падение"""
+        inputs = ['left', 'right', os.path.join('nodir', 'report.txt'), '']
+        with patch('builtins.input', side_effect=inputs), \
+                patch.object(fm, 'working_directory', self.test_dir):
+            fm.compare_folders()
+        output = "\n".join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn("Ошибка: не удалось создать отчет", output)
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestCompareFiles(unittest.TestCase):
+    """Тесты сравнения двух файлов"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.data = os.urandom(300000)
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+    
+    def write(self, name, data):
+        """Создание тестового файла"""
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+    
+    def test_same_files(self):
+        """Одинаковые файлы"""
+        a = self.write('a.bin', self.data)
+        b = self.write('b.bin', self.data)
+        self.assertEqual(fm.compare_files(a, b), ('same', None))
+    
+    def test_size_checked_first(self):
+        """Разный размер определяется без чтения содержимого"""
+        a = self.write('a.bin', self.data)
+        b = self.write('b.bin', self.data[:-1])
+        with patch('builtins.open') as mock_open_file:
+            self.assertEqual(fm.compare_files(a, b), ('size', None))
+        mock_open_file.assert_not_called()
+    
+    def test_offset_of_first_difference(self):
+        """Смещение первого различия, в том числе во втором блоке"""
+        a = self.write('a.bin', self.data)
+        changed = bytearray(self.data)
+        changed[200001] ^= 0xFF
+        changed[250000] ^= 0xFF
+        b = self.write('b.bin', bytes(changed))
+        with patch.object(fm, 'COMPARE_BUFFER_SIZE', 65536):
+            self.assertEqual(fm.compare_files(a, b), ('content', 200001))
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestFileViewer(unittest.TestCase):
+    """Тесты просмотра начала/конца файла и слежения"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'app.log')
+        with open(self.path, 'w') as f:
+            for i in range(1, 101):
+                f.write(f"line {i}\n")
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+    
+    def test_head_and_tail(self):
+        """Начало и конец файла"""
+        self.assertEqual(fm.read_head(self.path, 3), ['line 1', 'line 2', 'line 3'])
+        self.assertEqual(fm.read_tail(self.path, 2), ['line 99', 'line 100'])
+        self.assertEqual(fm.read_tail(self.path, 500)[0], 'line 1')
+    
+    def test_empty_file(self):
+        """Пустой файл"""
+        empty = os.path.join(self.test_dir, 'empty.log')
+        open(empty, 'w').close()
+        self.assertEqual(fm.read_head(empty), [])
+        self.assertEqual(fm.read_tail(empty), [])
+    
+    def test_follow_yields_appended_lines(self):
+        """Слежение выдает только дописанные строки"""
+        import threading
+        
+        def append():
+            with open(self.path, 'a') as f:
+                f.write("new 1\nnew 2\n")
+        
+        timer = threading.Timer(0.2, append)
+        timer.start()
+        lines = fm.follow_file(self.path, timeout=0.1)
+        try:
+            self.assertEqual([next(lines), next(lines)], ['new 1', 'new 2'])
+        finally:
+            lines.close()
+            timer.join()
+    
+    def test_follow_stops(self):
+        """Функция stop завершает слежение"""
+        self.assertEqual(list(fm.follow_file(self.path, stop=lambda: True)), [])
+    
+    def test_follow_rotation_drops_partial_line(self):
+        """После ротации недописанная строка старого файла не склеивается с новой"""
+        steps = []
+        
+        def stop():
+            steps.append(None)
+            if len(steps) == 2:
+                with open(self.path, 'a') as f:
+                    f.write("partial")
+            elif len(steps) == 3:
+                os.rename(self.path, self.path + '.1')
+                with open(self.path, 'w') as f:
+                    f.write("fresh line\nnext\n")
+            return False
+        
+        with patch.object(fm, 'FOLLOW_READ_CHUNK', 3):
+            lines = fm.follow_file(self.path, stop=stop, timeout=0.01)
+            try:
+                self.assertEqual([next(lines), next(lines)], ['fresh line', 'next'])
+            finally:
+                lines.close()
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestHexViewer(unittest.TestCase):
+    """Тесты hex-просмотра"""
+    
+    def test_format_hex_rows(self):
+        """Строка дампа: смещение, байты и ASCII"""
+        lines = fm.format_hex_rows(b'Hello\x00world!', 0, rows=1)
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith('0000000000  48 65 6c 6c 6f 00'))
+        self.assertTrue(lines[0].endswith('|Hello.world!|'))
+    
+    def test_find_bytes_across_chunk_boundary(self):
+        """Совпадение на границе участков поиска не теряется"""
+        data = b'a' * 100 + b'NEEDLE' + b'a' * 100
+        self.assertEqual(fm.find_bytes(data, b'NEEDLE', 0, chunk_size=103), 100)
+        self.assertEqual(fm.find_bytes(data, b'NEEDLE', 101, chunk_size=50), -1)
+    
+    def test_parse_offset(self):
+        """Смещение в десятичном и шестнадцатеричном виде"""
+        self.assertEqual(fm.parse_offset('4096'), 4096)
+        self.assertEqual(fm.parse_offset('0x1000'), 4096)
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestSplitJoin(unittest.TestCase):
+    """Тесты разбиения и склейки файлов"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'data.csv')
+        self.data = b''.join(f"row {i}\n".encode() for i in range(1000))
+        with open(self.path, 'wb') as f:
+            f.write(self.data)
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+    
+    def read(self, path):
+        """Чтение файла целиком"""
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def test_parse_size(self):
+        """Размер с суффиксом"""
+        self.assertEqual(fm.parse_size('100M'), 100 * 1024 * 1024)
+        self.assertEqual(fm.parse_size('512'), 512)
+        self.assertEqual(fm.parse_size('1.5k'), 1536)
+        self.assertRaises(ValueError, fm.parse_size, '0')
+    
+    def test_split_by_size_and_join(self):
+        """Разбиение по размеру и склейка дают исходный файл"""
+        parts = fm.split_file(self.path, part_size=1000)
+        self.assertEqual(len(parts), -(-len(self.data) // 1000))
+        self.assertEqual(os.path.basename(parts[0]), 'data.csv.part001')
+        self.assertEqual(fm.find_parts(parts[-1]), parts)
+        joined = os.path.join(self.test_dir, 'joined.csv')
+        self.assertEqual(fm.join_files(parts, joined), len(self.data))
+        self.assertEqual(self.read(joined), self.data)
+    
+    def test_split_by_lines(self):
+        """Разбиение по числу строк режет строго по переводам строк"""
+        with patch.object(fm, 'COPY_CHUNK_SIZE', 1000):
+            parts = fm.split_file(self.path, part_lines=300)
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(self.read(parts[0]).count(b'\n'), 300)
+        self.assertTrue(self.read(parts[1]).startswith(b'row 300\n'))
+        self.assertEqual(b''.join(self.read(part) for part in parts), self.data)
+    
+    def test_join_without_copy_file_range(self):
+        """Склейка работает и без copy_file_range"""
+        parts = fm.split_file(self.path, part_size=4096)
+        joined = os.path.join(self.test_dir, 'joined.csv')
+        with patch.object(fm.os, 'copy_file_range', side_effect=OSError(fm.errno.EXDEV, 'cross-device'),
+                          create=True):
+            fm.join_files(parts, joined)
+        self.assertEqual(self.read(joined), self.data)
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestDirectoryHistory(unittest.TestCase):
+    """Тесты истории папок и перехода по ключевым словам"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.original_working_dir = fm.working_directory
+        fm.working_directory = self.test_dir
+        self.db_patch = patch.multiple(fm, DIRECTORY_DB_FILE=os.path.join(self.test_dir, '.dirs'),
+                                       _directory_db=None)
+        self.db_patch.start()
+        self.project_src = os.path.join(self.test_dir, 'projects', 'app', 'src')
+        self.other_src = os.path.join(self.test_dir, 'other', 'src')
+        os.makedirs(self.project_src)
+        os.makedirs(self.other_src)
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.db_patch.stop()
+        shutil.rmtree(self.test_dir)
+        fm.working_directory = self.original_working_dir
+    
+    def test_best_match_by_frecency(self):
+        """Чаще посещаемая папка побеждает, ключевые слова учитывают порядок"""
+        fm.record_directory_visit(self.project_src)
+        fm.record_directory_visit(self.project_src)
+        fm.record_directory_visit(self.other_src)
+        self.assertEqual(fm.find_directory('src'), self.project_src)
+        self.assertEqual(fm.find_directory('other src'), self.other_src)
+        self.assertIsNone(fm.find_directory('src other'))
+    
+    def test_history_persisted_and_loaded_lazily(self):
+        """История сохраняется в файл и загружается при первом поиске"""
+        fm.record_directory_visit(self.other_src)
+        fm._directory_db = None
+        self.assertEqual(fm.find_directory('oth sr'), self.other_src)
+    
+    def test_aging_evicts_rare_entries(self):
+        """При переполнении ранги уменьшаются, редкие папки удаляются"""
+        with patch.object(fm, 'DIRECTORY_DB_MAX_AGE', 10):
+            for _ in range(10):
+                fm.record_directory_visit(self.project_src)
+            fm.record_directory_visit(self.other_src)
+        db = fm.load_directory_db()
+        self.assertNotIn(self.other_src, db)
+        self.assertLess(db[self.project_src][0], 10)
+    
+    def test_missing_directory_evicted(self):
+        """Удаленная папка исчезает из истории при поиске"""
+        fm.record_directory_visit(self.other_src)
+        shutil.rmtree(self.other_src)
+        self.assertIsNone(fm.find_directory('other src'))
+        self.assertNotIn(self.other_src, fm.load_directory_db())
+    
+    @patch('builtins.input', return_value='app src')
+    @patch('builtins.print')
+    def test_change_directory_jumps(self, mock_print, mock_input):
+        """Смена директории по ключевым словам из истории"""
+        fm.record_directory_visit(self.project_src)
+        fm.change_directory()
+        self.assertEqual(fm.working_directory, self.project_src)
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestPathCompletion(unittest.TestCase):
+    """Тесты автодополнения путей"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.original_working_dir = fm.working_directory
+        fm.working_directory = self.test_dir
+        fm._completion_cache.clear()
+        os.makedirs(os.path.join(self.test_dir, 'docs', 'reports'))
+        for name in ('data.txt', 'database.db', os.path.join('docs', 'readme.md')):
+            open(os.path.join(self.test_dir, name), 'w').close()
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+        fm.working_directory = self.original_working_dir
+    
+    def test_prefix_completion(self):
+        """Дополнение по префиксу, папки со слешем"""
+        self.assertEqual(fm.list_completions('dat', self.test_dir), ['data.txt', 'database.db'])
+        self.assertEqual(fm.list_completions('do', self.test_dir), ['docs/'])
+        self.assertEqual(fm.list_completions('docs/re', self.test_dir), ['docs/readme.md', 'docs/reports/'])
+    
+    def test_readline_states(self):
+        """readline получает варианты по номеру и None в конце"""
+        self.assertEqual(fm.complete_path('data', 0), 'data.txt')
+        self.assertEqual(fm.complete_path('data', 1), 'database.db')
+        self.assertIsNone(fm.complete_path('data', 2))
+    
+    def test_cache_invalidated_by_mtime(self):
+        """Кэш папки используется, пока не изменилось ее время"""
+        fm.list_completions('d', self.test_dir)
+        with patch.object(fm.os, 'scandir', side_effect=AssertionError("scandir")):
+            fm.list_completions('da', self.test_dir)
+        open(os.path.join(self.test_dir, 'dawn.txt'), 'w').close()
+        os.utime(self.test_dir, ns=(0, 1))
+        self.assertIn('dawn.txt', fm.list_completions('da', self.test_dir))
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestListingPrefetch(unittest.TestCase):
+    """Тесты кэша и предзагрузки списков папок"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.current = os.path.join(self.test_dir, 'current')
+        for name in ('alpha', 'beta'):
+            os.makedirs(os.path.join(self.current, name))
+        open(os.path.join(self.current, 'file.txt'), 'w').close()
+        fm._listing_cache.clear()
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+        fm._listing_cache.clear()
+    
+    def test_prefetch_subdirectories_and_parent(self):
+        """Предзагрузка читает подпапки и родителя"""
+        fm.prefetch_listings(self.current).join()
+        for path in (self.current, self.test_dir,
+                     os.path.join(self.current, 'alpha'), os.path.join(self.current, 'beta')):
+            self.assertIn(path, fm._listing_cache)
+    
+    def test_listing_served_from_cache(self):
+        """Предзагруженный список отдается без scandir, изменение папки сбрасывает кэш"""
+        first = fm.cached_listing(self.current, prefetch=True)
+        with patch.object(fm.os, 'scandir', side_effect=AssertionError("scandir")):
+            self.assertEqual(fm.read_directory(self.current), first)
+        fm.cached_listing(self.current, prefetch=True)
+        open(os.path.join(self.current, 'new.txt'), 'w').close()
+        os.utime(self.current, ns=(0, 1))
+        names = [item[0] for item in fm.read_directory(self.current)]
+        self.assertIn('new.txt', names)
+    
+    def test_listing_shows_fresh_sizes(self):
+        """Повторный просмотр папки перечитывает размеры дописанных файлов"""
+        fm.cached_listing(self.current, prefetch=True)
+        fm.read_directory(self.current)
+        mtime = os.stat(self.current).st_mtime_ns
+        with open(os.path.join(self.current, 'file.txt'), 'wb') as f:
+            f.write(b'x' * 5000)
+        os.utime(self.current, ns=(mtime, mtime))
+        sizes = dict((item[0], item[3]) for item in fm.read_directory(self.current))
+        self.assertEqual(sizes['file.txt'], 5000)
+    
+    def test_cache_expires(self):
+        """Устаревший список перечитывается"""
+        fm.cached_listing(self.current, prefetch=True)
+        with patch.object(fm, 'LISTING_CACHE_TTL', 0), \
+             patch.object(fm, 'scan_directory', return_value=fm.EntryStore()) as scan:
+            self.assertEqual(len(fm.read_directory(self.current)), 0)
+        scan.assert_called_once_with(self.current)
+    
+    def test_lru_limit_and_setting(self):
+        """Размер кэша ограничен, предзагрузку можно выключить"""
+        with patch.object(fm, 'LISTING_CACHE_SIZE', 2):
+            for name in ('alpha', 'beta', ''):
+                fm.cached_listing(os.path.join(self.current, name))
+        self.assertEqual(len(fm._listing_cache), 2)
+        self.assertNotIn(os.path.join(self.current, 'alpha'), fm._listing_cache)
+        with patch.dict(fm.operation_settings, prefetch_listings=False):
+            self.assertIsNone(fm.prefetch_listings(self.current))
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestEntryStore(unittest.TestCase):
+    """Тесты компактного хранилища, размера папки и поиска"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, 'docs', 'old'))
+        for name, size in (('b.txt', 3), ('a.log', 5), (os.path.join('docs', 'Report.TXT'), 7),
+                           (os.path.join('docs', 'old', 'notes.txt'), 11)):
+            with open(os.path.join(self.test_dir, name), 'wb') as f:
+                f.write(b'x' * size)
+        fm._listing_cache.clear()
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+        fm._listing_cache.clear()
+    
+    def test_store_columns(self):
+        """Имена в общем буфере, сортировка по номерам, кортежи при итерации"""
+        store = fm.EntryStore()
+        store.append('zeta', 10, fm.stat.S_IFREG)
+        store.append('альфа', 0, fm.stat.S_IFDIR)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(list(store), [('zeta', False, True, 10), ('альфа', True, False, 0)])
+        self.assertEqual([store.name(i) for i in store.sorted_indices()], ['zeta', 'альфа'])
+        self.assertEqual(store.total_size(), 10)
+    
+    def test_sorted_indices(self):
+        """Сортировка номеров дает полный порядок имен"""
+        store = fm.EntryStore()
+        names = ['f%02d' % (i * 7 % 20) for i in range(20)] + ['b', 'a', 'ж', 'f1']
+        for name in names:
+            store.append(name, 0, fm.stat.S_IFREG)
+        indices = store.sorted_indices()
+        self.assertEqual([store.name(i) for i in indices], sorted(names))
+        self.assertEqual(indices.typecode, 'I')
+        self.assertEqual(len(fm.EntryStore().sorted_indices()), 0)
+    
+    def test_read_directory_store(self):
+        """Листинг папки возвращает хранилище с размерами файлов"""
+        items = fm.read_directory(self.test_dir)
+        self.assertIsInstance(items, fm.EntryStore)
+        self.assertEqual(sorted(items), [('a.log', False, True, 5), ('b.txt', False, True, 3),
+                                         ('docs', True, False, 0)])
+    
+    def test_directory_size(self):
+        """Размер дерева считается рекурсивно"""
+        result = fm.directory_size(self.test_dir)
+        self.assertEqual(result, {"files": 4, "dirs": 2, "bytes": 26, "errors": 0})
+    
+    def test_search(self):
+        """Поиск по шаблону и подстроке без учета регистра"""
+        found = fm.search_files(self.test_dir, '*.txt')
+        names = sorted(found.name(i) for i in range(len(found)))
+        self.assertEqual(names, ['b.txt', os.path.join('docs', 'Report.TXT'),
+                                 os.path.join('docs', 'old', 'notes.txt')])
+        found = fm.search_files(self.test_dir, 'OL')
+        self.assertEqual([found.name(i) for i in range(len(found))], [os.path.join('docs', 'old')])
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestResourceMonitor(unittest.TestCase):
+    """Тесты сведений о системе и монитора ресурсов"""
+    
+    def setUp(self):
+        """Подготовка к тестам: поддельный каталог /proc"""
+        self.proc = tempfile.mkdtemp()
+        self.write('stat', "cpu  100 0 100 700 100 0 0 0 0 0\ncpu0 1 2 3 4\n")
+        self.write('meminfo', "MemTotal:       2048 kB\nMemFree:  10 kB\nMemAvailable:   1024 kB\n")
+        self.write('diskstats', "   8       0 sda 1 0 8 0 1 0 16 0 0 0 0\n"
+                                "   8       1 sda1 1 0 8 0 1 0 16 0 0 0 0\n")
+        self.write('mounts', f"/dev/sda1 {self.proc} ext4 rw 0 0\nproc /proc proc rw 0 0\n")
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.proc)
+    
+    def write(self, name, text):
+        with open(os.path.join(self.proc, name), 'w') as f:
+            f.write(text)
+    
+    def test_parsers(self):
+        """Разбор /proc/stat, meminfo, diskstats и mounts"""
+        self.assertEqual(fm.parse_cpu_times("cpu  100 0 100 700 100 0 0 0 0 0\n"), (200, 1000))
+        self.assertEqual(fm.parse_meminfo("MemTotal: 2 kB\nMemAvailable: 1 kB\n"), (2048, 1024))
+        text = "8 0 sda 1 0 8 0 1 0 16\n8 1 sda1 1 0 8 0 1 0 16\n"
+        self.assertEqual(fm.parse_diskstats(text, {'sda'}), (4096, 8192))
+        self.assertEqual(fm.parse_mounts("/dev/sdb1 /mnt/my\\040disk ext4 rw 0 0\ntmpfs /tmp tmpfs rw 0 0\n"),
+                         ['/mnt/my disk'])
+    
+    def test_sample_rates(self):
+        """Загрузка CPU и скорость диска по разнице снимков"""
+        with patch.object(fm, 'SYS_BLOCK_DIR', self.proc + '/missing'):
+            monitor = fm.ResourceMonitor(self.proc)
+        try:
+            first = monitor.sample()
+            self.assertIsNone(first["cpu"])
+            self.assertEqual(first["memory"], (2048 * 1024, 1024 * 1024))
+            self.assertEqual([point for point, _, _ in first["mounts"]], [self.proc])
+            self.write('stat', "cpu  150 0 150 750 150 0 0 0 0 0\n")
+            second = monitor.sample()
+            self.assertAlmostEqual(second["cpu"], 50.0)
+            self.assertEqual(second["disk"], (0, 0))
+            self.assertTrue(any(line.startswith("CPU:") for line in fm.format_sample(second)))
+        finally:
+            monitor.close()
+    
+    def test_static_info_cached(self):
+        """Статические сведения вычисляются один раз"""
+        with patch.object(fm, '_static_system_info', None), \
+             patch.object(fm.platform, 'processor', return_value='cpu') as processor:
+            fm.static_system_info()
+            fm.static_system_info()
+        processor.assert_called_once()
+
+
+@unittest.skipIf(fm is None or not hasattr(os, 'statvfs'), "Нужен os.statvfs")
+class TestCopyPreflight(unittest.TestCase):
+    """Тесты проверки места перед копированием"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.test_dir, 'src')
+        os.makedirs(os.path.join(self.source, 'sub'))
+        for name, size in (('a.bin', 1), ('b.bin', 5000), (os.path.join('sub', 'c.bin'), 4096)):
+            with open(os.path.join(self.source, name), 'wb') as f:
+                f.write(b'x' * size)
+        self.original_working_dir = fm.working_directory
+        fm.working_directory = self.test_dir
+        fm._listing_cache.clear()
+        # Результат не должен зависеть от поддержки reflink в ФС тестов
+        self.reflink_patch = patch.object(fm, 'reflink_supported', return_value=False)
+        self.reflink_patch.start()
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.reflink_patch.stop()
+        shutil.rmtree(self.test_dir)
+        fm.working_directory = self.original_working_dir
+    
+    def fake_statvfs(self, free_blocks, free_inodes, total_inodes=1000):
+        real = os.statvfs(self.test_dir)
+        fields = dict(f_frsize=4096, f_bavail=free_blocks, f_files=total_inodes, f_favail=free_inodes)
+        return type('StatVFS', (), dict({name: getattr(real, name) for name in dir(real)
+                                         if name.startswith('f_')}, **fields))()
+    
+    def test_estimate_tree(self):
+        """Размеры округляются до блоков, папки занимают блок и inode"""
+        self.assertEqual(fm.estimate_tree(self.source, 4096, workers=2), (6 * 4096, 5))
+        self.assertEqual(fm.estimate_tree(self.source), (5000 + 4096 + 1 + 2, 5))
+    
+    def test_preflight_limits(self):
+        """Отказ по блокам и по inode, без ограничения inode - проверка только места"""
+        dest = os.path.join(self.test_dir, 'dst')
+        with patch.object(fm.os, 'statvfs', return_value=self.fake_statvfs(5, 100)):
+            self.assertIn("места", fm.preflight_copy(self.source, dest))
+        with patch.object(fm.os, 'statvfs', return_value=self.fake_statvfs(100, 4)):
+            self.assertIn("inode", fm.preflight_copy(self.source, dest))
+        with patch.object(fm.os, 'statvfs', return_value=self.fake_statvfs(100, 0, total_inodes=0)):
+            self.assertIsNone(fm.preflight_copy(self.source, dest))
+    
+    def test_sparse_source_estimated_by_allocation(self):
+        """Разреженный файл оценивается по занятым блокам, если дыры сохраняются"""
+        image = os.path.join(self.source, 'image.img')
+        with open(image, 'wb') as f:
+            f.truncate(64 * 1024 * 1024)
+            f.write(b'data')
+        if not fm.is_sparse_file(image):
+            self.skipTest("ФС не поддерживает разреженные файлы")
+        dest = os.path.join(self.test_dir, 'dst')
+        with patch.object(fm.os, 'statvfs', return_value=self.fake_statvfs(1024, 100)):
+            with patch.dict(fm.operation_settings, sparse_copy=True):
+                self.assertIsNone(fm.preflight_copy(self.source, dest))
+                self.assertIsNone(fm.preflight_copy(image, dest))
+            with patch.dict(fm.operation_settings, sparse_copy=False):
+                self.assertIn("места", fm.preflight_copy(self.source, dest))
+    
+    def test_reflink_skips_block_check(self):
+        """При клонировании не хватает только inode, не места"""
+        dest = os.path.join(self.test_dir, 'dst')
+        with patch.object(fm.os, 'statvfs', return_value=self.fake_statvfs(5, 100)), \
+                patch.object(fm, 'reflink_supported', return_value=True) as mock_probe:
+            self.assertIsNone(fm.preflight_copy(self.source, dest))
+            with patch.object(fm.os, 'statvfs', return_value=self.fake_statvfs(5, 4)):
+                self.assertIn("inode", fm.preflight_copy(self.source, dest))
+            with patch.dict(fm.operation_settings, copy_mode='copy'):
+                self.assertIn("места", fm.preflight_copy(self.source, dest))
+        self.assertEqual(mock_probe.call_count, 2)
+    
+    def test_reflink_probe_cleans_up(self):
+        """Проба клонирования не оставляет файлов в назначении"""
+        self.reflink_patch.stop()
+        try:
+            dest_dir = os.path.join(self.test_dir, 'dst')
+            os.makedirs(dest_dir)
+            fm.reflink_supported(self.source, dest_dir)
+            self.assertEqual(os.listdir(dest_dir), [])
+            self.assertFalse(fm.reflink_supported(os.path.join(self.test_dir, 'dst'), self.test_dir))
+        finally:
+            self.reflink_patch.start()
+    
+    @patch('builtins.input', side_effect=['src', 'dst', ''])
+    @patch('builtins.print')
+    def test_copy_refused_before_writing(self, mock_print, mock_input):
+        """Копирование не начинается, если места не хватит"""
+        with patch.object(fm.os, 'statvfs', return_value=self.fake_statvfs(1, 100)):
+            fm.copy_item()
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, 'dst')))
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestFileTypeBreakdown(unittest.TestCase):
+    """Тесты статистики по типам файлов"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        files = {'readme.md': 10, 'Makefile': 3, os.path.join('logs', 'a.log'): 100,
+                 os.path.join('logs', 'old', 'b.LOG'): 50, os.path.join('src', 'main.py'): 20}
+        for name, size in files.items():
+            path = os.path.join(self.test_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'x' * size)
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+    
+    def test_aggregation(self):
+        """Счетчики по расширениям и папкам верхнего уровня"""
+        by_extension, by_folder = fm.file_type_breakdown(self.test_dir, workers=2)
+        self.assertEqual(by_extension, {'.md': [1, 10], '': [1, 3], '.log': [2, 150], '.py': [1, 20]})
+        self.assertEqual(by_folder, {'': [2, 13], 'logs': [2, 150], 'src': [1, 20]})
+    
+    def test_single_subtree_split_across_threads(self):
+        """Папки одного большого поддерева обрабатываются разными потоками"""
+        for i in range(40):
+            path = os.path.join(self.test_dir, 'logs', 'deep', 'd%d' % i, 'f.log')
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                f.write(b'x')
+        threads = set()
+        
+        def visit(state, entry, rel):
+            threads.add(fm.threading.get_ident())
+            fm.time.sleep(0.002)
+            state.append(rel)
+        
+        states = fm.parallel_walk(self.test_dir, visit, list, workers=4)
+        self.assertEqual(len(states), 4)
+        self.assertGreater(len(threads), 1)
+        by_extension, by_folder = fm.file_type_breakdown(self.test_dir, workers=4)
+        self.assertEqual(by_extension['.log'], [42, 190])
+        self.assertEqual(by_folder['logs'], [42, 190])
+    
+    def test_interrupted_walk_returns(self):
+        """Прерывание обхода не оставляет потоки ждать очередь"""
+        for i in range(20):
+            os.makedirs(os.path.join(self.test_dir, 'logs', 'd%d' % i))
+        visited = []
+        
+        def visit(state, entry, rel):
+            if len(visited) == 3:
+                _thread.interrupt_main()
+            visited.append(rel)
+            fm.time.sleep(0.02)
+        
+        with self.assertRaises(KeyboardInterrupt):
+            fm.parallel_walk(self.test_dir, visit, list, workers=2)
+        # Оставшиеся папки после прерывания не обходятся
+        self.assertLess(len(visited), 28)
+    
+    def test_exclude_rules(self):
+        """Исключенные файлы и папки не попадают в статистику"""
+        by_extension, by_folder = fm.file_type_breakdown(
+            self.test_dir, workers=2, exclude=fm.ExcludeRules(['old', '*.md']))
+        self.assertEqual(by_extension, {'': [1, 3], '.log': [1, 100], '.py': [1, 20]})
+        self.assertEqual(by_folder, {'': [1, 3], 'logs': [1, 100], 'src': [1, 20]})
+    
+    @patch('builtins.input', return_value='')
+    @patch('builtins.print')
+    def test_report(self, mock_print, mock_input):
+        """Отчет выводит итог и самые большие группы"""
+        with patch.object(fm, 'working_directory', self.test_dir):
+            fm.breakdown_item()
+        output = "\n".join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn("Всего: 5 файлов", output)
+        self.assertLess(output.index(".log"), output.index(".py"))
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestCleanup(unittest.TestCase):
+    """Тесты очистки старых файлов"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        old = fm.time.time() - 10 * 24 * 3600
+        for name, size, age in (('a.log', 100, old), ('b.log', 5, old), ('c.txt', 100, old),
+                                (os.path.join('sub', 'd.log'), 200, old), ('new.log', 100, None)):
+            path = os.path.join(self.test_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'x' * size)
+            if age:
+                os.utime(path, (age, age))
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+    
+    def test_candidates_filtered(self):
+        """Отбор по шаблону, возрасту и размеру"""
+        found = fm.iter_cleanup_candidates(self.test_dir, '*.log', days=7, min_size=50)
+        names = sorted(os.path.relpath(path, self.test_dir) for path, _ in found)
+        self.assertEqual(names, ['a.log', os.path.join('sub', 'd.log')])
+        self.assertEqual(fm.summarize_candidates(
+            fm.iter_cleanup_candidates(self.test_dir, '*.log', days=7)), (3, 305))
+    
+    def test_delete_candidates(self):
+        """Удаление в пуле потоков с подсчетом освобожденного места"""
+        candidates = fm.iter_cleanup_candidates(self.test_dir, '*.log', days=7)
+        result = fm.delete_candidates(candidates, workers=2)
+        self.assertEqual(result, {"deleted": 3, "bytes": 305, "failed": 0})
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ['c.txt', 'new.log', 'sub'])
+    
+    @patch('builtins.input', side_effect=['*.log', '7', '', '', 'n', ''])
+    @patch('builtins.print')
+    def test_dry_run_keeps_files(self, mock_print, mock_input):
+        """Без подтверждения показывается только итог пробного прогона"""
+        with patch.object(fm, 'working_directory', self.test_dir):
+            fm.cleanup_item()
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, 'a.log')))
+        output = "\n".join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn("Найдено файлов: 3", output)
+
+
+@unittest.skipIf(fm is None, "Модуль file_manager не найден")
+class TestExcludeRules(unittest.TestCase):
+    """Тесты правил исключения в синтаксисе .gitignore"""
+    
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.test_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.test_dir, 'project')
+        for name in ('.git/objects/ab', 'node_modules/lib/index.js', 'src/main.py',
+                     'src/main.pyc', 'src/keep.pyc', 'build/out.o', 'README'):
+            path = os.path.join(self.source, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('data')
+        self.rules = fm.ExcludeRules(['# служебные', '.git', 'node_modules/', '*.pyc',
+                                      '!keep.pyc', '/build'])
+        fm._listing_cache.clear()
+    
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.test_dir)
+    
+    def test_rule_syntax(self):
+        """Имена, окончания, только папки, привязка к корню, ** и отрицание"""
+        rules = fm.ExcludeRules(['logs/', '*.tmp', 'docs/*.md', '**/cache/v?', '!important.tmp', '[ab].bak'])
+        self.assertTrue(rules.excluded('x/logs', is_dir=True))
+        self.assertFalse(rules.excluded('x/logs'))
+        self.assertTrue(rules.excluded(os.path.join('a', 'b.tmp')))
+        self.assertFalse(rules.excluded('important.tmp'))
+        self.assertTrue(rules.excluded('docs/readme.md'))
+        self.assertFalse(rules.excluded('src/docs/readme.md'))
+        self.assertTrue(rules.excluded('q/w/cache/v1'))
+        self.assertTrue(rules.excluded('a.bak'))
+        self.assertFalse(rules.excluded('c.bak'))
+        self.assertFalse(fm.ExcludeRules(['# только комментарий', '']))
+    
+    def test_walks_pruned(self):
+        """Обход, размер и поиск не заходят в исключенные папки"""
+        rels = sorted(rel.replace(os.sep, '/') for _, rel in fm.iter_tree(self.source, exclude=self.rules))
+        self.assertEqual(rels, ['README', 'src', 'src/keep.pyc', 'src/main.py'])
+        self.assertEqual(fm.directory_size(self.source, self.rules)["files"], 3)
+        self.assertEqual(len(fm.search_files(self.source, 'index', self.rules)), 0)
+        self.assertEqual(fm.estimate_tree(self.source, exclude=self.rules)[1], 5)
+    
+    def test_copy_and_delete(self):
+        """Копирование пропускает исключенное, удаление его оставляет"""
+        dest = os.path.join(self.test_dir, 'copy')
+        fm.copy_path(self.source, dest, self.rules)
+        self.assertEqual(sorted(os.listdir(dest)), ['README', 'src'])
+        self.assertEqual(sorted(os.listdir(os.path.join(dest, 'src'))), ['keep.pyc', 'main.py'])
+        
+        self.assertEqual(fm.delete_path(self.source, fm.ExcludeRules(['*.pyc', '!keep.pyc'])), (6, 1))
+        self.assertEqual(sorted(os.listdir(self.source)), ['src'])
+        self.assertEqual(os.listdir(os.path.join(self.source, 'src')), ['main.pyc'])
+    
+    @patch('builtins.input', return_value='')
+    @patch('builtins.print')
+    def test_delete_item_reports_kept(self, mock_print, mock_input):
+        """Меню сообщает о частичном удалении, если исключенное осталось"""
+        mock_input.side_effect = ['project', '']
+        with patch.object(fm, 'working_directory', self.test_dir), \
+                patch.dict(fm.operation_settings, exclude_patterns='*.pyc;!keep.pyc'):
+            fm.delete_item()
+        output = "\n".join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn("удалена частично: удалено файлов 6, оставлено исключенных элементов 1", output)
+        self.assertNotIn("успешно", output)
+        self.assertTrue(os.path.isdir(self.source))
+    
+    def test_rules_from_settings(self):
+        """Правила из настроек компилируются один раз"""
+        with patch.dict(fm.operation_settings, exclude_patterns=''):
+            self.assertIsNone(fm.exclude_rules())
+        with patch.dict(fm.operation_settings, exclude_patterns='.git;*.pyc'):
+            rules = fm.exclude_rules()
+            self.assertIs(fm.exclude_rules(), rules)
+            self.assertTrue(rules.excluded('a.pyc'))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file